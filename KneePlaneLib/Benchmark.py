@@ -0,0 +1,205 @@
+"""
+形状模型拟合的性能基准，不依赖 Slicer 界面，也不需要 static/asset/ssm 下的真实模型。
+
+makeShapeModel 在球面上生成平均形状、平滑的主成分及网格拓扑，写成与真实模型相同的
+mean_<bone>.npy、ssm_<bone>.npy、mesh_<bone>.npy；makeCasePoints 由随机形状经刚性变换
+生成采集点。runBenchmarks 对各环节计时，结果可写成 JSON，与上一次提交的结果比较：
+
+    python -m KneePlaneLib.Benchmark --resolution 100 --output bench.json --baseline last.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+from .MeshIO import saveTopology, trianglesFromPolyData
+from .SSMFitting import FEMUR_LANDMARK_INDEX, TIBIA_LANDMARK_INDEX, computeMeanDistance
+from .ShapeModel import getShapeModel
+
+# ssm.FemurNihe/TibiaNihe 中初始权重的个数
+NUMBER_OF_MODES = {'femur': 30, 'tibia': 51}
+LANDMARK_INDEX = {'femur': FEMUR_LANDMARK_INDEX, 'tibia': TIBIA_LANDMARK_INDEX}
+
+
+def makeShapeModel(directory, bone, resolution=100, numberOfModes=None, radius=40.0, seed=0):
+    """
+    生成合成的统计形状模型文件。
+
+    参数:
+    directory (str): 输出目录。
+    bone (str): 'femur' 或 'tibia'。
+    resolution (int): 球面经纬方向的分辨率，顶点数约为 resolution^2，须大于标志点的最大索引。
+    numberOfModes (int): 主成分个数，默认与 ssm 中的初始权重个数一致。
+
+    返回:
+    int: 顶点数。
+    """
+    if numberOfModes is None:
+        numberOfModes = NUMBER_OF_MODES[bone]
+    source = vtk.vtkSphereSource()
+    source.SetRadius(radius)
+    source.SetThetaResolution(resolution)
+    source.SetPhiResolution(resolution)
+    source.Update()
+    polydata = source.GetOutput()
+    sphere = numpy_support.vtk_to_numpy(polydata.GetPoints().GetData()).astype(np.float64)
+    n = len(sphere)
+    if n <= max(LANDMARK_INDEX[bone]):
+        raise ValueError("resolution too small for the landmark indices: " + str(resolution))
+    # 平均形状取椭球；主成分为沿径向的低频位移，避免沿表面滑动的退化方向
+    meanShape = sphere * [1.0, 0.8, 1.3]
+    normals = sphere / radius
+    rng = np.random.default_rng(seed)
+    eigenvectors = np.empty((numberOfModes, 3 * n))
+    for k in range(numberOfModes):
+        f = np.sin(np.dot(normals, rng.normal(size=3)) * (1 + k % 4) + rng.uniform(0, 2 * np.pi))
+        eigenvectors[k] = (f[:, None] * normals).ravel()
+    eigenvectors *= 0.5 * np.sqrt(n) / np.linalg.norm(eigenvectors, axis=1, keepdims=True)
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, 'mean_' + bone + '.npy'), meanShape)
+    np.save(os.path.join(directory, 'ssm_' + bone + '.npy'), eigenvectors)
+    saveTopology(os.path.join(directory, 'mesh_' + bone + '.npy'), trianglesFromPolyData(polydata))
+    return n
+
+
+def makeCasePoints(directory, bone, numberOfPoints=60, noise=0.2, seed=1):
+    """
+    由随机形状生成一组采集点，行的排列与 KneePlaneWidget.getFemurPoints/getTibiaPoints 一致。
+
+    返回:
+    tuple: (采集点, 真实形状权重)。
+    """
+    model = getShapeModel(directory, bone)
+    rng = np.random.default_rng(seed)
+    alpha = rng.normal(size=model.eigenvectors.shape[0])
+    shape = model.meanShape + np.dot(alpha, model.eigenvectors).reshape((-1, 3))
+    angle = rng.uniform(-0.3, 0.3)
+    R = np.array([[np.cos(angle), -np.sin(angle), 0], [np.sin(angle), np.cos(angle), 0], [0, 0, 1]])
+    t = rng.normal(scale=5.0, size=3)
+    # 模型坐标 -> 采集坐标（ssm 中再对 x、y 取反）
+    toCase = lambda p: np.dot(p - t, R) * [-1, -1, 1]
+    keypoints = toCase(shape[LANDMARK_INDEX[bone]])
+    surface = toCase(shape[rng.choice(len(shape), numberOfPoints, replace=False)])
+    surface += rng.normal(scale=noise, size=surface.shape)
+    if bone == 'femur':
+        # preparPoints_femur 按 [0, 6, 5, 4, 3, 2, 1, 7, 8] 取关键点，第 9、10 行为 H 点和股骨头球心
+        rows = np.empty_like(keypoints)
+        rows[[0, 6, 5, 4, 3, 2, 1, 7, 8]] = keypoints
+    else:
+        # preparPoints_tibia 取前 9 行，第 9、10 行为内外踝点
+        rows = keypoints
+    extra = rows.mean(axis=0) + rng.normal(scale=20.0, size=(2, 3))
+    return np.vstack([rows, extra, surface]), alpha
+
+
+# 重复执行 func，返回各次耗时（秒）的统计；setup 在每次计时前执行，不计入耗时
+def timeit(func, repeat=5, setup=None):
+    times = []
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'best': min(times), 'median': statistics.median(times), 'repeat': repeat}
+
+
+def runBenchmarks(directory=None, resolution=100, numberOfPoints=60, repeat=5, fitRepeat=1, seed=0):
+    """
+    对拟合流程各环节计时。
+
+    参数:
+    directory (str): 合成模型所在目录，为 None 时在临时目录中生成。
+    resolution (int): 合成模型的分辨率，见 makeShapeModel。
+    numberOfPoints (int): 每块骨骼的区域采集点个数。
+    repeat (int): 单项环节的重复次数。
+    fitRepeat (int): 完整拟合（fitFemur/fitTibia）的重复次数。
+
+    返回:
+    dict: 各项的耗时统计及参数。
+    """
+    from .Planning import fitFemur, fitTibia, ssm
+    from .Workspace import Workspace
+
+    with tempfile.TemporaryDirectory(prefix='KneePlaneBench_') as tmp:
+        if directory is None:
+            directory = os.path.join(tmp, 'ssm')
+            for bone in NUMBER_OF_MODES:
+                makeShapeModel(directory, bone, resolution, seed=seed)
+        workspace = Workspace(directory, os.path.join(tmp, 'out'))
+        results = {'resolution': resolution, 'numberOfPoints': numberOfPoints, 'timings': {}}
+        timings = results['timings']
+        for bone, fit in (('femur', fitFemur), ('tibia', fitTibia)):
+            model = getShapeModel(directory, bone)
+            points, alpha = makeCasePoints(directory, bone, numberOfPoints, seed=seed + 1)
+            keypoints = points[:9] * [-1, -1, 1]
+            meshPoints = np.delete(points, [9, 10], axis=0) * [-1, -1, 1]
+            fitter = model.newFitter(keypoints, meshPoints)
+            x = np.zeros(fitter.numberOfModes)
+            for name, dtype in (('reconstruct', np.float64), ('reconstruct32', np.float32)):
+                eigenvectors = getShapeModel(directory, bone, dtype).eigenvectors
+                y = x.astype(dtype)
+                timings[bone + '.' + name] = timeit(lambda: np.dot(y, eigenvectors), repeat * 20)
+            timings[bone + '.loss'] = timeit(lambda: fitter.meanDistance(x), repeat)
+            # 重写形状会清除最近点缓存，每次都重新求对应关系
+            timings[bone + '.residuals'] = timeit(lambda: fitter.residuals(x), repeat,
+                                                  lambda: fitter.updatePolyData(fitter.reconstruct(x)))
+            trans = fitter.computeLandmarkTransform(fitter.reconstructLandmarks(x))
+            timings[bone + '.computeMeanDistance'] = timeit(
+                lambda: computeMeanDistance(fitter.meshPoints, fitter.polydata, trans), repeat)
+            target = fitter.transformMeshPoints(trans)
+            snapper = ssm()
+            timings[bone + '.moveSurfaceToTarget'] = timeit(
+                lambda: snapper.moveSurfaceToTarget(fitter.points.copy(), target), repeat)
+            # 每次拟合前清空缓存，避免直接命中上一次的结果
+            timings[bone + '.fit'] = timeit(lambda: fit(workspace, points.copy(), 'L'), fitRepeat,
+                                            model.fitCache.clear)
+    return results
+
+
+# 与基准结果比较，返回耗时超过 threshold 倍的项：{名称: (基准, 当前)}
+def compareResults(results, baseline, threshold=1.2, key='best'):
+    regressions = {}
+    for name, timing in results['timings'].items():
+        old = baseline.get('timings', {}).get(name)
+        if old is not None and timing[key] > threshold * old[key]:
+            regressions[name] = (old[key], timing[key])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SSM fitting path on synthetic shape models.")
+    parser.add_argument('--directory', help="existing shape model directory (default: synthetic)")
+    parser.add_argument('--resolution', type=int, default=100)
+    parser.add_argument('--points', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--fit-repeat', type=int, default=1)
+    parser.add_argument('--output', help="write results as JSON")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.directory, args.resolution, args.points, args.repeat, args.fit_repeat)
+    for name, timing in results['timings'].items():
+        print("%-32s best %10.4f s   median %10.4f s" % (name, timing['best'], timing['median']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compareResults(results, json.load(f), args.threshold)
+        for name, (old, new) in regressions.items():
+            print("REGRESSION %s: %.4f s -> %.4f s" % (name, old, new))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
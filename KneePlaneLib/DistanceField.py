@@ -0,0 +1,158 @@
+import itertools
+import math
+
+import numpy as np
+import vtk
+from scipy import ndimage
+from vtk.util import numpy_support
+
+
+# 批量查询 DistanceField、RigidLocator 或 vtkImplicitPolyDataDistance，points 为 (n,3)，返回 (有符号距离 (n,), 最近点 (n,3))
+def evaluateLocator(locator, points):
+    if isinstance(locator, (DistanceField, RigidLocator)):
+        return locator.evaluate(points)
+    points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+    distance = np.empty(len(points))
+    closest = np.empty((len(points), 3))
+    for i in range(len(points)):
+        distance[i] = locator.EvaluateFunctionAndGetClosestPoint(points[i], closest[i])
+    return distance, closest
+
+
+class RigidLocator:
+    """
+    刚性移动后的模型的定位器。
+
+    定位器只对移动前的模型建立一次，查询点用 matrix 的逆变换回原模型坐标，最近点再变换回来。
+    matrix 含镜像（行列式为负）时三角形朝向随之翻转，距离取反，与变换模型后重建定位器的结果一致。
+    """
+
+    def __init__(self, locator, matrix):
+        self.locator = locator
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        self.inverse = np.linalg.inv(self.matrix)
+        self.sign = 1.0 if np.linalg.det(self.matrix[0:3, 0:3]) > 0 else -1.0
+
+    def evaluate(self, points):
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        local = np.dot(points, self.inverse[0:3, 0:3].T) + self.inverse[0:3, 3]
+        distance, closest = evaluateLocator(self.locator, local)
+        return self.sign * distance, np.dot(closest, self.matrix[0:3, 0:3].T) + self.matrix[0:3, 3]
+
+    def evaluateFunctionAndGetClosestPoint(self, point, closestPoint):
+        distance, closest = self.evaluate(point)
+        closestPoint[:] = closest[0]
+        return float(distance[0])
+
+    EvaluateFunctionAndGetClosestPoint = evaluateFunctionAndGetClosestPoint
+
+
+class DistanceField:
+    """
+    模型表面的有符号距离场。
+
+    在模型包围盒（外扩 margin）内的规则网格上预先计算有符号距离（与 vtkImplicitPolyDataDistance
+    一致，法向外侧为正）及最近表面点，查询时三线性插值，耗时与模型大小无关。
+
+    距表面 2 mm 以内的点，spacing 为 1 mm 时距离误差 99% 在 0.05 mm 以内，最大约 0.1 mm
+    （合成股骨模型上实测）；减小 spacing 只降低典型误差，最大误差来自切平面与折面网格的差别，
+    不随 spacing 减小，需要更高精度时不设 distanceFieldSpacing，逐点精确计算。
+
+    构建时先加密表面（边长不超过 spacing/2），每个网格节点记下离它最近的表面顶点，
+    再以欧氏距离变换求各节点最近的这类节点，取其表面顶点的切平面求距离和最近点，全部向量化。
+    只保存距表面 margin + 2·spacing 以内的节点，网格外或远离表面的点退回
+    vtkImplicitPolyDataDistance 逐点精确计算。
+    """
+
+    def __init__(self, polydata, spacing=1.0, margin=5.0):
+        self.spacing = float(spacing)
+        self.implicit = vtk.vtkImplicitPolyDataDistance()
+        self.implicit.SetInput(polydata)
+        bounds = np.array(polydata.GetBounds()).reshape((3, 2))
+        self.origin = bounds[:, 0] - margin
+        self.shape = np.ceil((bounds[:, 1] + margin - self.origin) / self.spacing).astype(np.int64) + 1
+        shape = tuple(int(n) for n in self.shape)
+
+        # 加密表面，顶点法向沿用原三角形的朝向（不重新定向），与 vtkImplicitPolyDataDistance 的符号一致；
+        # 去掉模型自带的法向，镜像变换后的模型自带法向与三角形朝向相反
+        surface = vtk.vtkPolyData()
+        surface.ShallowCopy(polydata)
+        surface.GetPointData().SetNormals(None)
+        subdivide = vtk.vtkAdaptiveSubdivisionFilter()
+        subdivide.SetInputData(surface)
+        subdivide.SetMaximumEdgeLength(self.spacing / 2)
+        subdivide.Update()
+        normals = vtk.vtkPolyDataNormals()
+        normals.SetInputData(subdivide.GetOutput())
+        normals.ComputePointNormalsOn()
+        normals.ComputeCellNormalsOff()
+        normals.SplittingOff()
+        normals.ConsistencyOff()
+        normals.AutoOrientNormalsOff()
+        normals.Update()
+        surface = normals.GetOutput()
+        samples = numpy_support.vtk_to_numpy(surface.GetPoints().GetData()).astype(np.float64)
+        sampleNormals = numpy_support.vtk_to_numpy(surface.GetPointData().GetNormals()).astype(np.float64)
+
+        # 每个表面顶点归到最近的网格节点，节点只保留离它最近的一个顶点
+        u = (samples - self.origin) / self.spacing
+        node = np.round(u).astype(np.int64)
+        offset = np.linalg.norm(u - node, axis=1)
+        flat = np.ravel_multi_index(tuple(node.T), shape)
+        order = np.lexsort((offset, flat))
+        flat, first = np.unique(flat[order], return_index=True)
+        sampleOfNode = np.full(int(np.prod(shape)), -1, dtype=np.int64)
+        sampleOfNode[flat] = order[first]
+
+        # 各节点最近的含表面顶点的节点
+        occupied = (sampleOfNode >= 0).reshape(shape)
+        edt, index = ndimage.distance_transform_edt(~occupied, return_indices=True)
+        nearestNode = np.ravel_multi_index(tuple(index), shape).ravel()
+        near = (edt.ravel() * self.spacing <= margin + 2 * self.spacing)
+
+        axes = [self.origin[i] + self.spacing * np.arange(shape[i]) for i in range(3)]
+        grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape((-1, 3))[near]
+        sample = sampleOfNode[nearestNode[near]]
+        n = sampleNormals[sample]
+        # 到最近表面顶点切平面的有符号距离，最近点为在切平面上的投影
+        distance = np.full(len(near), np.nan)
+        distance[near] = np.einsum('ij,ij->i', grid - samples[sample], n)
+        closest = np.full((len(near), 3), np.nan)
+        closest[near] = grid - distance[near, None] * n
+        self.distance = distance.reshape(shape)
+        self.closest = closest.reshape(shape + (3,))
+
+    # 批量查询，points 为 (n,3)，返回 (有符号距离 (n,), 最近点 (n,3))
+    def evaluate(self, points):
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        u = (points - self.origin) / self.spacing
+        inside = np.all((u >= 0) & (u <= self.shape - 1), axis=1)
+        i0 = np.clip(np.floor(u).astype(np.int64), 0, self.shape - 2)
+        f = u - i0
+        distance = np.zeros(len(points))
+        closest = np.zeros((len(points), 3))
+        for corner in itertools.product((0, 1), repeat=3):
+            w = np.prod(np.where(corner, f, 1.0 - f), axis=1)
+            index = tuple(i0[:, a] + corner[a] for a in range(3))
+            distance += w * self.distance[index]
+            closest += w[:, None] * self.closest[index]
+        # 网格外或插值用到远离表面的节点时逐点精确计算
+        for i in np.flatnonzero(~inside | np.isnan(distance)):
+            surfacePoint = np.zeros(3)
+            distance[i] = self.implicit.EvaluateFunctionAndGetClosestPoint(points[i], surfacePoint)
+            closest[i] = surfacePoint
+        return distance, closest
+
+    # 单点查询，与 vtkImplicitPolyDataDistance.EvaluateFunctionAndGetClosestPoint 相同：返回距离，最近点写入 closestPoint
+    def evaluateFunctionAndGetClosestPoint(self, point, closestPoint):
+        distance, closest = self.evaluate(point)
+        closestPoint[:] = closest[0]
+        return float(distance[0])
+
+    # 与 vtkImplicitPolyDataDistance 同名，可直接替换
+    EvaluateFunctionAndGetClosestPoint = evaluateFunctionAndGetClosestPoint
+
+    # 网格节点数（用于估计内存：每个节点 4 个 float64）
+    @property
+    def numberOfNodes(self):
+        return int(math.prod(int(n) for n in self.shape))
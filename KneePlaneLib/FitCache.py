@@ -0,0 +1,71 @@
+import collections
+import hashlib
+import threading
+
+import numpy as np
+
+FitResult = collections.namedtuple('FitResult', ['alpha', 'trans', 'loss'])
+
+
+class FitCache:
+    """
+    形状模型拟合结果缓存，以采集点及拟合设置为键。
+
+    采集点按 tolerance 取整后与 settings（求解方式、主成分精度等，见 SSMFitter.cacheSettings）一起求哈希：
+    设置相同且在容差内相同的输入直接返回上次的结果；否则取关键点最接近的一次结果作为初值
+    （平均偏差不超过 warmStartDistance，不限设置，任何设置的结果都可作为初值）。
+    """
+
+    def __init__(self, tolerance=1e-3, warmStartDistance=10.0, maxSize=32):
+        self.tolerance = tolerance
+        self.warmStartDistance = warmStartDistance
+        self.maxSize = maxSize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, points, settings=''):
+        q = np.round(np.asarray(points, dtype=np.float64) / self.tolerance).astype(np.int64)
+        return hashlib.sha1(str(settings).encode() + str(q.shape).encode() + q.tobytes()).hexdigest()
+
+    # 设置相同且容差内相同的输入，返回缓存的 FitResult，否则返回 None
+    def lookup(self, points, numberOfKeypoints, settings=''):
+        points = np.asarray(points, dtype=np.float64)
+        with self._lock:
+            k = self.key(points, settings)
+            if k in self._entries and self._entries[k][2] == numberOfKeypoints:
+                self._entries.move_to_end(k)
+                return self._entries[k][1]
+            # 取整边界两侧的点哈希不同，逐个比较
+            for k, (cached, result, n, s) in self._entries.items():
+                if n == numberOfKeypoints and s == settings and cached.shape == points.shape \
+                        and np.abs(cached - points).max() <= self.tolerance:
+                    self._entries.move_to_end(k)
+                    return result
+        return None
+
+    # 关键点平均偏差最小的缓存结果，用作拟合初值
+    def nearest(self, points, numberOfKeypoints):
+        keypoints = np.asarray(points, dtype=np.float64)[:numberOfKeypoints]
+        best = None
+        bestDistance = self.warmStartDistance
+        with self._lock:
+            for cached, result, n, s in self._entries.values():
+                if n != numberOfKeypoints:
+                    continue
+                d = np.linalg.norm(cached[:n] - keypoints, axis=1).mean()
+                if d <= bestDistance:
+                    best, bestDistance = result, d
+        return best
+
+    def store(self, points, numberOfKeypoints, alpha, trans, loss, settings=''):
+        points = np.array(points, dtype=np.float64)
+        result = FitResult(np.array(alpha, dtype=np.float64), np.array(trans, dtype=np.float64), float(loss))
+        with self._lock:
+            self._entries[self.key(points, settings)] = (points, result, numberOfKeypoints, settings)
+            while len(self._entries) > self.maxSize:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,71 @@
+import collections
+import contextlib
+import json
+import time
+
+# 各阶段耗时的键，按流程先后排列
+STAGES = ('modelLoading', 'optimization', 'surfaceSnapping', 'planning', 'meshIO', 'smoothing', 'implantSelection')
+
+
+class FitReport:
+    """
+    一次骨骼生成（形状模型拟合 + 规划）的过程记录。
+
+    记录损失函数调用次数、每次调用的平均距离、缓存命中情况及各阶段耗时（秒），
+    只含基本类型，可在工作进程中填写后传回主进程，也可用 save 写成 JSON。
+    """
+
+    def __init__(self, bone):
+        self.bone = bone
+        self.solver = None
+        # 'hit' 直接取缓存，'warm' 以缓存结果为初值，'miss' 未用缓存
+        self.cache = None
+        self.numberOfEvaluations = 0
+        self.lossTrace = []
+        # 最终参与优化的主成分个数（逐步加入主成分时可能少于模型的主成分个数）
+        self.numberOfModes = 0
+        # 多分辨率拟合时粗网格上的调用次数和平均距离
+        self.coarseNumberOfEvaluations = 0
+        self.coarseLossTrace = []
+        # 单精度模式的验证结果，见 ShapeModel.comparePrecision
+        self.precision = None
+        self.timings = collections.OrderedDict((name, 0.0) for name in STAGES)
+        self.wallTime = 0.0
+
+    # 统计 with 块的耗时，同一阶段多次进入时累加
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    # 从拟合器取调用次数和损失记录
+    def recordFit(self, fitter, solver=None):
+        self.solver = solver
+        self.cache = fitter.cacheStatus
+        self.numberOfEvaluations = int(fitter.numberOfEvaluations)
+        self.lossTrace = [float(loss) for loss in fitter.lossTrace]
+        self.numberOfModes = int(fitter.numberOfActiveModes)
+        self.coarseNumberOfEvaluations = int(fitter.coarseNumberOfEvaluations)
+        self.coarseLossTrace = [float(loss) for loss in fitter.coarseLossTrace]
+
+    def toDict(self):
+        return {
+            'bone': self.bone,
+            'solver': self.solver,
+            'cache': self.cache,
+            'numberOfEvaluations': self.numberOfEvaluations,
+            'lossTrace': self.lossTrace,
+            'numberOfModes': self.numberOfModes,
+            'coarseNumberOfEvaluations': self.coarseNumberOfEvaluations,
+            'coarseLossTrace': self.coarseLossTrace,
+            'precision': self.precision,
+            'timings': dict(self.timings),
+            'wallTime': self.wallTime,
+        }
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.toDict(), f, indent=2)
@@ -0,0 +1,161 @@
+"""
+假体库索引：各型号的参考截骨面点、胫骨假体标志点、股骨截骨面中心/法向及假体模型路径，
+合并保存为模板目录下的 假体库/index.npz，每个进程只读取一次。
+
+由 假体库/a 下的 txt 生成索引：
+
+    python -m KneePlaneLib.ImplantLibrary static/asset/ssm
+"""
+import argparse
+import os
+import sys
+import threading
+
+import numpy as np
+
+# 假体型号，由小到大
+SIZES = ('1-5', '2', '2-5', '3', '4', '5')
+INDEX_NAME = os.path.join('假体库', 'index.npz')
+POINT_DIRECTORY = os.path.join('假体库', 'a')
+MESH_DIRECTORY = '假体库/新建文件夹/'
+MESH_KEYS = ('femurLeftMeshes', 'femurRightMeshes', 'tibiaMeshes', 'insertMeshes')
+
+# 各型号股骨假体五个截骨面的中心 (型号, 截骨面, 3)
+FEMUR_PLANE_CENTERS = np.array([
+    [[26.02337837, -9.75870705, 17.9810009],
+     [4.09119368, 15.38273907, 52.60262299],
+     [27.1153183, -25.06363297, 33.4731369],
+     [24.84617805, 6.57620001, 24.46980286],
+     [27.42753792, -21.2009716, 21.05237007]],
+    [[27.43185806, -9.48676395, 17.97990036],
+     [2.74365425, 16.84506226, 54.29030228],
+     [28.19996643, -26.78960228, 34.69130325],
+     [26.02665329, 6.64299297, 24.03082085],
+     [29.09984589, -23.38258934, 22.70436096]],
+    [[29.20111847, -9.13559914, 17.97800064],
+     [3.35643864, 18.51843262, 55.00411987],
+     [22.51490211, -27.72629547, 42.68426895],
+     [27.12848663, 7.07448769, 23.76689148],
+     [30.01587677, -23.92788315, 22.52571678]],
+    [[29.20111847, -9.13559914, 17.97800064],
+     [5.28588533, 20.57026291, 57.9031105],
+     [21.47888374, -28.70822334, 46.11002731],
+     [29.24750519, 8.71127605, 24.48480034],
+     [30.89999962, -24.23026848, 22.03702545]],
+    [[29.20111847, -9.13559914, 17.97800064],
+     [5.85270691, 23.05169678, 60.28654099],
+     [21.09650612, -30.24600601, 47.68890762],
+     [30.85585403, 10.05577946, 24.61523628],
+     [34.46922302, -26.14871788, 22.59331131]],
+    [[29.20111847, -9.13559914, 17.97800064],
+     [7.20682764, 23.6224575, 61.33934402],
+     [23.2329483, -32.42521667, 49.56483841],
+     [31.82821846, 10.43430519, 25.68725395],
+     [36.05748367, -26.62179184, 23.76049614]]])
+
+# 五个截骨面的法向，各型号相同
+FEMUR_PLANE_NORMALS = np.array([
+    [0.00000000e+00, -0.00000000e+00, 1.00000000e+00],
+    [-1.22643894e-06, -9.94364794e-01, 1.06012534e-01],
+    [5.17413353e-07, 9.99843475e-01, 1.76924985e-02],
+    [-6.10205166e-07, -7.02040987e-01, 7.12136541e-01],
+    [7.07153645e-08, 7.02036904e-01, 7.12140566e-01]])
+
+
+class ImplantLibrary:
+    """
+    各型号假体的参数，按 SIZES 的顺序堆叠成数组，同一进程内由 getImplantLibrary 共享，使用方不得修改。
+
+    femurCutPoints (型号, 6, 3): femur-<size>.txt，前三行为第二刀截骨面上的点，后三行为第三刀。
+    tibiaPoints (型号, n, 3): Tibia-<size>.txt，胫骨假体底面及边缘的标志点。
+    femurPlaneCenters (型号, 5, 3)、femurPlaneNormals (5, 3): 股骨假体五个截骨面。
+    femurLeftMeshes、femurRightMeshes、tibiaMeshes、insertMeshes (型号,): 相对模板目录的模型路径。
+    """
+
+    def __init__(self, femurCutPoints, tibiaPoints, femurPlaneCenters=FEMUR_PLANE_CENTERS,
+                 femurPlaneNormals=FEMUR_PLANE_NORMALS, sizes=SIZES):
+        self.sizes = list(sizes)
+        self.femurCutPoints = np.asarray(femurCutPoints, dtype=np.float64)
+        self.tibiaPoints = np.asarray(tibiaPoints, dtype=np.float64)
+        self.femurPlaneCenters = np.asarray(femurPlaneCenters, dtype=np.float64)
+        self.femurPlaneNormals = np.asarray(femurPlaneNormals, dtype=np.float64)
+        self.femurLeftMeshes = np.array([MESH_DIRECTORY + 'femur-L' + size + '.stl' for size in self.sizes])
+        self.femurRightMeshes = np.array([MESH_DIRECTORY + 'femur-R' + size + '.stl' for size in self.sizes])
+        self.tibiaMeshes = np.array([MESH_DIRECTORY + 'Tibia-' + size + '.stl' for size in self.sizes])
+        self.insertMeshes = np.array([MESH_DIRECTORY + 'insert-' + size + '.stl' for size in self.sizes])
+        for name in ('femurCutPoints', 'tibiaPoints', 'femurPlaneCenters', 'femurPlaneNormals'):
+            getattr(self, name).flags.writeable = False
+
+    # 股骨假体模型路径，LorR 为 'L' 或 'R'
+    def femurMesh(self, LorR, index):
+        return (self.femurRightMeshes if LorR == 'R' else self.femurLeftMeshes)[index]
+
+    @classmethod
+    def fromText(cls, directory):
+        """
+        由模板目录下 假体库/a 中各型号的 femur-<size>.txt、Tibia-<size>.txt 建立索引。
+        """
+        pointDirectory = os.path.join(directory, POINT_DIRECTORY)
+        femurCutPoints = [np.loadtxt(os.path.join(pointDirectory, 'femur-' + size + '.txt')) for size in SIZES]
+        tibiaPoints = [np.loadtxt(os.path.join(pointDirectory, 'Tibia-' + size + '.txt')) for size in SIZES]
+        return cls(femurCutPoints, tibiaPoints)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            library = cls(data['femurCutPoints'], data['tibiaPoints'], data['femurPlaneCenters'],
+                          data['femurPlaneNormals'], [str(size) for size in data['sizes']])
+            for name in MESH_KEYS:
+                if name in data:
+                    setattr(library, name, data[name])
+        return library
+
+    def save(self, path):
+        meshes = dict((name, getattr(self, name)) for name in MESH_KEYS)
+        np.savez(path, sizes=np.array(self.sizes), femurCutPoints=self.femurCutPoints,
+                 tibiaPoints=self.tibiaPoints, femurPlaneCenters=self.femurPlaneCenters,
+                 femurPlaneNormals=self.femurPlaneNormals, **meshes)
+
+
+_libraries = {}
+_librariesLock = threading.Lock()
+
+
+def getImplantLibrary(directory):
+    """
+    取得进程内共享的假体库，每个模板目录只加载一次。
+
+    有 假体库/index.npz 时直接读取，否则读 假体库/a 下的 txt（模板目录只读，不在此写索引）。
+
+    参数:
+    directory (str): 模板目录，如 static/asset/ssm。
+
+    返回:
+    ImplantLibrary: 共享的只读假体库。
+    """
+    key = os.path.abspath(directory)
+    with _librariesLock:
+        library = _libraries.get(key)
+        if library is None:
+            index = os.path.join(key, INDEX_NAME)
+            if os.path.exists(index):
+                library = ImplantLibrary.load(index)
+            else:
+                library = ImplantLibrary.fromText(key)
+            _libraries[key] = library
+    return library
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build 假体库/index.npz from the per-size text files.")
+    parser.add_argument('directory', help="template directory, e.g. static/asset/ssm")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(args.directory, INDEX_NAME)
+    ImplantLibrary.fromText(args.directory).save(path)
+    print("wrote " + path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
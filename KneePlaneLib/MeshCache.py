@@ -0,0 +1,65 @@
+import os
+import threading
+
+import vtk
+
+from .DistanceField import DistanceField
+from .ModelBuilder import readPolyData
+
+
+class CachedMesh:
+    """
+    从文件读入的模型及其 vtkImplicitPolyDataDistance。
+
+    同一进程内由 getCachedMesh 共享，使用方不得修改 polydata；
+    距离场按网格间距分别建立一次。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.polydata = readPolyData(path)
+        self.locator = vtk.vtkImplicitPolyDataDistance()
+        self.locator.SetInput(self.polydata)
+        self.distanceFields = {}
+        self.lock = threading.Lock()
+
+    def getDistanceField(self, spacing):
+        with self.lock:
+            field = self.distanceFields.get(float(spacing))
+            if field is None:
+                field = DistanceField(self.polydata, spacing)
+                self.distanceFields[float(spacing)] = field
+        return field
+
+
+_meshes = {}
+_meshesLock = threading.Lock()
+
+
+def getCachedMesh(path):
+    """
+    取得进程内共享的模型及定位器，按绝对路径和修改时间缓存，文件改动后重新读取。
+
+    参数:
+    path (str): .stl/.vtk/.vtp/.ply 模型文件。
+
+    返回:
+    CachedMesh: 共享的只读模型。
+    """
+    path = os.path.abspath(path)
+    key = (path, os.path.getmtime(path))
+    with _meshesLock:
+        mesh = _meshes.get(key)
+        if mesh is None:
+            # 同一文件的旧版本不再使用
+            for old in [k for k in _meshes if k[0] == path]:
+                del _meshes[old]
+            mesh = CachedMesh(path)
+            _meshes[key] = mesh
+    return mesh
+
+
+def clearMeshCache():
+    with _meshesLock:
+        _meshes.clear()
@@ -0,0 +1,70 @@
+"""
+形状模型网格的二进制格式。
+
+拓扑（三角面片顶点索引）为 int32 的 (M,3) 数组，每块骨骼只存一份 mesh_<bone>.npy；
+拟合得到的骨骼只存 float32 的 (N,3) 顶点数组。两者都是 .npy 文件，一次读写，可内存映射。
+"""
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+
+# 三角网格的顶点索引，(M,3) int32
+def trianglesFromPolyData(polydata):
+    polys = polydata.GetPolys()
+    offsets = numpy_support.vtk_to_numpy(polys.GetOffsetsArray())
+    if polydata.GetNumberOfCells() != polys.GetNumberOfCells() or np.any(np.diff(offsets) != 3):
+        raise ValueError("SSM mesh must be triangulated")
+    connectivity = numpy_support.vtk_to_numpy(polys.GetConnectivityArray())
+    return connectivity.astype(np.int32).reshape((-1, 3))
+
+
+# 由顶点数组和三角面片索引生成 vtkPolyData
+def polyDataFromArrays(points, triangles):
+    points = np.asarray(points, dtype=np.float32)
+    triangles = np.asarray(triangles)
+    vtkPoints = vtk.vtkPoints()
+    vtkPoints.SetData(numpy_support.numpy_to_vtk(points, deep=True))
+    offsets = np.arange(0, 3 * len(triangles) + 1, 3, dtype=np.int64)
+    polys = vtk.vtkCellArray()
+    polys.SetData(numpy_support.numpy_to_vtkIdTypeArray(offsets, deep=True),
+                  numpy_support.numpy_to_vtkIdTypeArray(triangles.astype(np.int64).ravel(), deep=True))
+    polydata = vtk.vtkPolyData()
+    polydata.SetPoints(vtkPoints)
+    polydata.SetPolys(polys)
+    return polydata
+
+
+def saveTopology(path, triangles):
+    np.save(path, np.ascontiguousarray(triangles, dtype=np.int32))
+
+
+def loadTopology(path, mmap=True):
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+def saveVertices(path, points):
+    np.save(path, np.ascontiguousarray(points, dtype=np.float32))
+
+
+def loadVertices(path, mmap=True):
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+# 拟合结果的顶点写入 path，拓扑另存
+def saveMesh(path, polydata):
+    saveVertices(path, numpy_support.vtk_to_numpy(polydata.GetPoints().GetData()))
+
+
+def loadMesh(path, triangles):
+    return polyDataFromArrays(loadVertices(path), triangles)
+
+
+# 把模板 vtk 文件中的拓扑转为 mesh_<bone>.npy，只需执行一次
+def convertTopology(vtkPath, npyPath):
+    reader = vtk.vtkPolyDataReader()
+    reader.SetFileName(vtkPath)
+    reader.Update()
+    triangles = trianglesFromPolyData(reader.GetOutput())
+    saveTopology(npyPath, triangles)
+    return triangles
@@ -0,0 +1,190 @@
+"""
+由已建立对应关系的骨骼网格训练统计形状模型，输出 ShapeModel 使用的
+mean_<bone>.npy（N×3）、ssm_<bone>.npy（K×3N）及 mesh_<bone>.npy。
+
+网格逐批从磁盘读取，内存占用只与批大小和主成分个数有关（增量 PCA），与样本数无关：
+
+    python -m KneePlaneLib.ModelBuilder femur out/ssm D:/train/femur --modes 30
+"""
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+
+from .MeshIO import loadVertices, saveTopology, trianglesFromPolyData
+from .Registration import rigidRegistration
+
+MESH_EXTENSIONS = ('.npy', '.vtk', '.vtp', '.stl', '.ply')
+
+
+class IncrementalPCA:
+    """
+    增量主成分分析：每批数据与已有的前 numberOfComponents 个奇异向量合并后重新做 SVD，
+    只保留截断后的结果（Ross et al. 2008，与 sklearn.decomposition.IncrementalPCA 相同）。
+    """
+
+    def __init__(self, numberOfComponents):
+        self.numberOfComponents = numberOfComponents
+        self.numberOfSamples = 0
+        self.mean = None
+        self.singularValues = None
+        self.components = None
+
+    def update(self, batch):
+        batch = np.asarray(batch, dtype=np.float64)
+        n = len(batch)
+        if n == 0:
+            return
+        batchMean = batch.mean(axis=0)
+        total = self.numberOfSamples + n
+        if self.numberOfSamples == 0:
+            X = batch - batchMean
+            mean = batchMean
+        else:
+            # 均值变化带来的修正行
+            correction = np.sqrt(self.numberOfSamples * n / total) * (self.mean - batchMean)
+            X = np.vstack([self.singularValues[:, None] * self.components, batch - batchMean, correction])
+            mean = self.mean + (batchMean - self.mean) * n / total
+        U, S, Vt = np.linalg.svd(X, full_matrices=False)
+        k = min(self.numberOfComponents, len(S))
+        self.singularValues = S[:k]
+        self.components = Vt[:k]
+        self.mean = mean
+        self.numberOfSamples = total
+
+    @property
+    def explainedVariance(self):
+        return self.singularValues ** 2 / max(self.numberOfSamples - 1, 1)
+
+
+# 读取网格顶点，返回 (N,3) float64；.npy 为 MeshIO 的顶点数组
+def readVertices(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        return np.asarray(loadVertices(path, mmap=False), dtype=np.float64)
+    return numpy_support.vtk_to_numpy(readPolyData(path).GetPoints().GetData()).astype(np.float64)
+
+
+def readPolyData(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.vtk':
+        reader = vtk.vtkPolyDataReader()
+    elif ext == '.vtp':
+        reader = vtk.vtkXMLPolyDataReader()
+    elif ext == '.stl':
+        reader = vtk.vtkSTLReader()
+    elif ext == '.ply':
+        reader = vtk.vtkPLYReader()
+    else:
+        raise ValueError("Unsupported mesh file: " + path)
+    reader.SetFileName(path)
+    reader.Update()
+    return reader.GetOutput()
+
+
+# 展开输入：目录取其中的网格文件，其余按通配符展开，结果排序
+def listMeshFiles(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths += [os.path.join(item, name) for name in os.listdir(item)
+                      if name.lower().endswith(MESH_EXTENSIONS)]
+        else:
+            paths += glob.glob(item)
+    return sorted(paths)
+
+
+# 逐批读取网格，刚性对齐到 reference 后展平为 (b,3N)
+def iterateBatches(paths, batchSize, reference=None):
+    for start in range(0, len(paths), batchSize):
+        batch = []
+        for path in paths[start:start + batchSize]:
+            points = readVertices(path)
+            if reference is not None:
+                if points.shape != reference.shape:
+                    raise ValueError("Mesh %s has %d points, expected %d" % (path, len(points), len(reference)))
+                trans = rigidRegistration(points, reference)
+                points = np.dot(points, trans[0:3, 0:3].T) + trans[0:3, 3]
+            batch.append(points.ravel())
+        yield np.array(batch)
+
+
+def buildShapeModel(paths, directory, bone, numberOfModes=30, batchSize=64, alignIterations=1, topology=None,
+                    oversampling=20, dtype=np.float64):
+    """
+    训练统计形状模型并写入 directory。
+
+    各网格须顶点一一对应（点数相同、顺序一致）。先逐个刚性对齐到参考形状求平均
+    （参考形状初始为第一个网格，迭代 alignIterations 次），再对齐到平均形状做增量 PCA。
+
+    参数:
+    paths (list): 网格文件路径（.npy/.vtk/.vtp/.stl/.ply）。
+    directory (str): 输出目录。
+    bone (str): 'femur' 或 'tibia'，决定文件名。
+    numberOfModes (int): 保留的主成分个数，股骨 30、胫骨 51 与 ssm 中的初始权重个数一致。
+    batchSize (int): 每批读入的网格数。
+    topology (str): 提供三角面片的网格文件，默认取第一个非 .npy 的输入网格。
+    oversampling (int): 增量 PCA 中额外保留的主成分个数，减小逐批截断的误差。
+    dtype: ssm_<bone>.npy 的精度，np.float32 时文件减半，ShapeModel(dtype=np.float32) 可直接内存映射。
+
+    返回:
+    np.array: 各主成分的方差。
+    """
+    if len(paths) < 2:
+        raise ValueError("At least two meshes are needed to build a shape model")
+    reference = readVertices(paths[0])
+    for i in range(alignIterations):
+        total = np.zeros(reference.size)
+        for batch in iterateBatches(paths, batchSize, reference):
+            total += batch.sum(axis=0)
+        reference = (total / len(paths)).reshape((-1, 3))
+
+    numberOfModes = min(numberOfModes, len(paths) - 1)
+    pca = IncrementalPCA(numberOfModes + oversampling)
+    for batch in iterateBatches(paths, batchSize, reference):
+        pca.update(batch)
+    variance = pca.explainedVariance[:numberOfModes]
+    # 主成分按标准差缩放，形状权重以标准差为单位：mean + alpha·ssm
+    eigenvectors = np.sqrt(variance)[:, None] * pca.components[:numberOfModes]
+
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, 'mean_' + bone + '.npy'), pca.mean.reshape((-1, 3)))
+    np.save(os.path.join(directory, 'ssm_' + bone + '.npy'), eigenvectors.astype(dtype))
+    if topology is None:
+        topology = next((path for path in paths if not path.lower().endswith('.npy')), None)
+    if topology is not None:
+        saveTopology(os.path.join(directory, 'mesh_' + bone + '.npy'), trianglesFromPolyData(readPolyData(topology)))
+    return variance
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build mean_<bone>.npy / ssm_<bone>.npy from corresponded meshes.")
+    parser.add_argument('bone', choices=['femur', 'tibia'])
+    parser.add_argument('output', help="output directory")
+    parser.add_argument('inputs', nargs='+', help="mesh files, directories or glob patterns")
+    parser.add_argument('--modes', type=int, help="number of modes (default 30 for femur, 51 for tibia)")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--align-iterations', type=int, default=1)
+    parser.add_argument('--topology', help="mesh providing the triangles (default: first non-.npy input)")
+    parser.add_argument('--float32', action='store_true', help="store the basis in single precision")
+    args = parser.parse_args(argv)
+
+    numberOfModes = args.modes or {'femur': 30, 'tibia': 51}[args.bone]
+    paths = listMeshFiles(args.inputs)
+    variance = buildShapeModel(paths, args.output, args.bone, numberOfModes, args.batch_size,
+                               args.align_iterations, args.topology,
+                               dtype=np.float32 if args.float32 else np.float64)
+    ratio = np.cumsum(variance) / variance.sum()
+    # 累计比例相对于保留的主成分
+    print("%d meshes, %d modes" % (len(paths), len(variance)))
+    for i in range(len(variance)):
+        print("mode %3d  variance %12.4f  cumulative %6.3f" % (i, variance[i], ratio[i]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
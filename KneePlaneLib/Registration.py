@@ -0,0 +1,34 @@
+import numpy as np
+
+
+def rigidRegistration(points_From, points_To):
+    """
+    刚性配准（SVD/Kabsch），与 vtkLandmarkTransform 的 RigidBody 模式结果一致。
+
+    参数:
+    points_From (np.array): 源点列，形如 (n,3)，或批量 (b,n,3)。
+    points_To (np.array): 目标点列，形状与 points_From 相同。
+
+    返回:
+    np.array: 将源点变换到目标点的 4x4 矩阵，批量输入时为 (b,4,4)。
+    """
+    points_From = np.asarray(points_From, dtype=np.float64)
+    points_To = np.asarray(points_To, dtype=np.float64)
+    if points_From.shape != points_To.shape:
+        raise ValueError("points_From and points_To must have the same shape")
+    centerFrom = points_From.mean(axis=-2, keepdims=True)
+    centerTo = points_To.mean(axis=-2, keepdims=True)
+    H = np.matmul(np.swapaxes(points_From - centerFrom, -1, -2), points_To - centerTo)
+    U, S, Vt = np.linalg.svd(H)
+    V = np.swapaxes(Vt, -1, -2)
+    # 避免求得反射矩阵
+    d = np.sign(np.linalg.det(np.matmul(V, np.swapaxes(U, -1, -2))))
+    d = np.where(d == 0, 1.0, d)
+    V[..., :, 2] *= d[..., None]
+    R = np.matmul(V, np.swapaxes(U, -1, -2))
+    t = centerTo[..., 0, :] - np.einsum('...ij,...j->...i', R, centerFrom[..., 0, :])
+    trans = np.zeros(R.shape[:-2] + (4, 4))
+    trans[..., 0:3, 0:3] = R
+    trans[..., 0:3, 3] = t
+    trans[..., 3, 3] = 1
+    return trans
@@ -0,0 +1,463 @@
+import collections
+import math
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+from scipy.optimize import OptimizeResult, least_squares, minimize
+
+from .MeshIO import trianglesFromPolyData
+from .Registration import rigidRegistration
+
+# 形状模型上与采集关键点一一对应的9个标志点
+FEMUR_LANDMARK_INDEX = [7841, 6968, 3089, 8589, 2161, 7462, 2410, 7457, 7692]
+TIBIA_LANDMARK_INDEX = [6304, 178, 4235, 1883, 7370, 6161, 4677, 6264, 1927]
+
+# 由粗到细拟合时完整网格上的收敛容差：初值已由粗网格求得，比 fit 的缺省值宽松
+REFINE_TOLERANCE = {'cobyla': 1e-3, 'lm': 1e-6, 'icp': 1e-4}
+
+# 粗网格模型：抽稀后的平均形状、前几个主成分、网格（不含点坐标的模板）、标志点索引及面片
+CoarseModel = collections.namedtuple('CoarseModel', ['meanShape', 'eigenvectors', 'polydata', 'landmarkIndex',
+                                                     'triangles'])
+
+
+# 计算在应用过转换后的点列到一个模型表面的平均距离
+def computeMeanDistance(inputFiducials, inputModel, transform):
+    cellId = vtk.mutable(0)
+    subId = vtk.mutable(0)
+    dist2 = vtk.mutable(0.0)
+    locator = vtk.vtkCellLocator()
+    locator.SetDataSet(inputModel)
+    locator.SetNumberOfCellsPerBucket(1)
+    locator.BuildLocator()
+    totalDistance = 0.0
+    n = inputFiducials.shape[0]
+    for fiducialIndex in range(0, n):
+        originalPoint = [inputFiducials[fiducialIndex, 0], inputFiducials[fiducialIndex, 1],
+                         inputFiducials[fiducialIndex, 2], 1]
+        transformedPoint = np.dot(transform, originalPoint)
+        surfacePoint = [0, 0, 0]
+        transformedPoint = transformedPoint[:3]
+        locator.FindClosestPoint(transformedPoint, surfacePoint, cellId, subId, dist2)
+        totalDistance = totalDistance + math.sqrt(dist2)
+    return (totalDistance / n)
+
+
+# 点在三角形内的重心坐标，points/a/b/c 均为 (n,3)
+def barycentricWeights(points, a, b, c):
+    v0 = b - a
+    v1 = c - a
+    v2 = points - a
+    d00 = np.einsum('ij,ij->i', v0, v0)
+    d01 = np.einsum('ij,ij->i', v0, v1)
+    d11 = np.einsum('ij,ij->i', v1, v1)
+    d20 = np.einsum('ij,ij->i', v2, v0)
+    d21 = np.einsum('ij,ij->i', v2, v1)
+    denom = d00 * d11 - d01 * d01
+    denom[denom == 0] = 1.0
+    v = (d11 * d20 - d01 * d21) / denom
+    w = (d00 * d21 - d01 * d20) / denom
+    return np.stack([1.0 - v - w, v, w], axis=1)
+
+
+# 抽稀模型网格，返回粗网格及其顶点在原网格中的索引
+def decimateMesh(polydata, reduction=0.9):
+    decimate = vtk.vtkDecimatePro()
+    decimate.SetInputData(polydata)
+    decimate.SetTargetReduction(reduction)
+    decimate.PreserveTopologyOn()
+    decimate.Update()
+    coarse = decimate.GetOutput()
+    # vtkDecimatePro 只删除顶点，保留的顶点坐标与原网格一致
+    locator = vtk.vtkPointLocator()
+    locator.SetDataSet(polydata)
+    locator.BuildLocator()
+    index = np.array([locator.FindClosestPoint(coarse.GetPoint(i)) for i in range(coarse.GetNumberOfPoints())],
+                     dtype=np.int64)
+    return coarse, index
+
+
+def buildCoarseModel(meanShape, eigenvectors, polydata, landmarkIndex, reduction=0.9, numberOfModes=10):
+    """
+    抽稀平均形状的网格，取前 numberOfModes 个主成分在保留顶点上的行，构造粗网格模型。
+
+    标志点追加在粗网格顶点之后，不属于任何面片，只用于刚性配准。
+
+    参数:
+    meanShape (np.array): 平均形状 (N,3)。
+    eigenvectors (np.array): 主成分 (K,3N)。
+    polydata (vtk.vtkPolyData): 与平均形状拓扑相同的网格。
+    landmarkIndex (np.array): 标志点在完整网格中的索引。
+
+    返回:
+    CoarseModel: 数组均为只读。
+    """
+    numberOfModes = min(numberOfModes, eigenvectors.shape[0])
+    meanMesh = vtk.vtkPolyData()
+    meanMesh.DeepCopy(polydata)
+    meanMesh.GetPoints().SetData(numpy_support.numpy_to_vtk(np.asarray(meanShape, dtype=np.float64), deep=True))
+    coarse, index = decimateMesh(meanMesh, reduction)
+    coarseLandmarkIndex = np.arange(len(index), len(index) + len(landmarkIndex))
+    index = np.concatenate([index, landmarkIndex])
+    coarseMean = np.ascontiguousarray(meanShape[index], dtype=np.float64)
+    points = vtk.vtkPoints()
+    points.SetData(numpy_support.numpy_to_vtk(coarseMean, deep=True))
+    coarse.SetPoints(points)
+    rows = (3 * index[:, None] + np.arange(3)[None, :]).ravel()
+    coarseEigenvectors = np.ascontiguousarray(eigenvectors[:numberOfModes, rows])
+    triangles = trianglesFromPolyData(coarse).astype(np.int64)
+    for array in (coarseMean, coarseEigenvectors, triangles, coarseLandmarkIndex):
+        array.setflags(write=False)
+    return CoarseModel(coarseMean, coarseEigenvectors, coarse, coarseLandmarkIndex, triangles)
+
+
+class SSMFitter:
+    """
+    统计形状模型拟合。
+
+    模型形状为 mean_shape + B·alpha，每组权重下先将采集的关键点刚性配准到模型标志点，
+    再计算采集点到模型表面的距离。支持三种求解方式：
+    'cobyla' 直接最小化平均距离（无导数）；
+    'lm' 以点到最近表面点的残差做 Levenberg–Marquardt，雅可比矩阵取固定对应关系时的 Gauss-Newton 近似
+    （见 jacobian），最小化的是距离平方和，与 'cobyla' 的平均距离不是同一目标；
+    'icp' 交替求最近点对应关系与闭式求解形状权重，每次迭代只建一次定位器。
+    fitMultiresolution 先在抽稀网格和前几个主成分上拟合，再回到完整网格以较松的容差细化；
+    粗网格由 coarseModels (reduction, numberOfModes) -> CoarseModel 提供（ShapeModel.newFitter 传入共享的
+    ShapeModel.coarseModel），为 None 时每次重新抽稀；
+    fitProgressive 从前几个主成分开始，平均距离仍明显下降时才逐步加入后面的主成分（仅限 COBYLA，
+    且主成分须按方差由大到小排列）；
+    fitWithCache 复用 FitCache 中相同或相近输入的结果。
+    """
+
+    def __init__(self, meanShape, eigenvectors, polydata, landmarkIndex, keypoints, meshPoints, triangles=None,
+                 coarseModels=None):
+        self.meanShape = np.asarray(meanShape, dtype=np.float64)
+        # float32 的主成分保持单精度（见 ShapeModel 的 dtype），重建时以单精度做矩阵乘法，其余计算仍为双精度
+        dtype = np.float32 if np.asarray(eigenvectors).dtype == np.float32 else np.float64
+        self.eigenvectors = np.asarray(eigenvectors, dtype=dtype)
+        self.numberOfPoints = self.meanShape.shape[0]
+        self.numberOfModes = self.eigenvectors.shape[0]
+        # B = eigenvectors.T 为 (3N,K)，按点重排为 (N,3,K) 便于按顶点取行；只是视图，不复制主成分
+        self.basis = self.eigenvectors.reshape((self.numberOfModes, self.numberOfPoints, 3)).transpose(1, 2, 0)
+        self.polydata = polydata
+        # 模型点与 vtkPoints 共用同一块内存，更新形状只需一次数组赋值
+        self.points = self.meanShape.copy()
+        self._pointsArray = numpy_support.numpy_to_vtk(self.points, deep=False)
+        self.polydata.GetPoints().SetData(self._pointsArray)
+        self.landmarkIndex = np.asarray(landmarkIndex)
+        # 刚性配准只用到标志点，预先取出对应的均值和基底行
+        self.landmarkMean = self.meanShape[self.landmarkIndex]
+        self.landmarkBasis = np.ascontiguousarray(self.basis[self.landmarkIndex], dtype=np.float64)
+        self.keypoints = np.asarray(keypoints, dtype=np.float64)[:len(self.landmarkIndex)]
+        self.meshPoints = np.asarray(meshPoints, dtype=np.float64)
+        self.triangles = self.getTriangles(polydata) if triangles is None else np.asarray(triangles, dtype=np.int64)
+        self.coarseModels = coarseModels
+        # 每次调用损失函数时的平均距离，供 FitReport 使用
+        self.numberOfEvaluations = 0
+        self.lossTrace = []
+        self.coarseNumberOfEvaluations = 0
+        self.coarseLossTrace = []
+        self.cacheStatus = None
+        # 参与优化的主成分个数，只有 fitProgressive 会少于 numberOfModes
+        self.numberOfActiveModes = self.numberOfModes
+        self._correspondenceAlpha = None
+        self._correspondence = None
+
+    # 读取模型的三角面片顶点索引
+    def getTriangles(self, polydata):
+        return trianglesFromPolyData(polydata).astype(np.int64)
+
+    # 由形状权重生成模型点
+    def reconstruct(self, alpha):
+        alpha = np.asarray(alpha, dtype=self.eigenvectors.dtype)
+        return self.meanShape + np.dot(alpha, self.eigenvectors).reshape((self.numberOfPoints, 3))
+
+    # 只生成标志点，不做整网格重建
+    def reconstructLandmarks(self, alpha):
+        return self.landmarkMean + np.dot(self.landmarkBasis, alpha)
+
+    # 将形状写入模型（原地赋值），返回共享的点数组
+    def updatePolyData(self, new_points):
+        self.points[:] = new_points
+        self._pointsArray.Modified()
+        self.polydata.GetPoints().Modified()
+        self.polydata.Modified()
+        self._correspondenceAlpha = None
+        return self.points
+
+    # 关键点到模型标志点的刚性变换
+    def computeLandmarkTransform(self, landmarks):
+        return rigidRegistration(self.keypoints, landmarks)
+
+    def transformMeshPoints(self, trans):
+        return np.dot(self.meshPoints, trans[0:3, 0:3].T) + trans[0:3, 3]
+
+    # 使点列到一个模型表面距离最小
+    def meanDistance(self, alpha):
+        self.numberOfEvaluations += 1
+        new_points = self.updatePolyData(self.reconstruct(alpha))
+        trans = self.computeLandmarkTransform(new_points[self.landmarkIndex])
+        loss = computeMeanDistance(self.meshPoints, self.polydata, trans)
+        self.lossTrace.append(loss)
+        return loss
+
+    # 求变换后采集点在当前模型上的最近点，记录所在三角形及重心坐标
+    def findCorrespondence(self, alpha):
+        if self._correspondenceAlpha is not None and np.array_equal(alpha, self._correspondenceAlpha):
+            return self._correspondence
+        self.numberOfEvaluations += 1
+        new_points = self.updatePolyData(self.reconstruct(alpha))
+        trans = self.computeLandmarkTransform(new_points[self.landmarkIndex])
+        transformed = self.transformMeshPoints(trans)
+
+        locator = vtk.vtkCellLocator()
+        locator.SetDataSet(self.polydata)
+        locator.SetNumberOfCellsPerBucket(1)
+        locator.BuildLocator()
+        cellId = vtk.mutable(0)
+        subId = vtk.mutable(0)
+        dist2 = vtk.mutable(0.0)
+        cellIds = np.zeros(len(transformed), dtype=np.int64)
+        closest = np.zeros_like(transformed)
+        surfacePoint = [0.0, 0.0, 0.0]
+        for i in range(len(transformed)):
+            locator.FindClosestPoint(transformed[i], surfacePoint, cellId, subId, dist2)
+            cellIds[i] = int(cellId)
+            closest[i] = surfacePoint
+        tri = self.triangles[cellIds]
+        weights = barycentricWeights(closest, new_points[tri[:, 0]], new_points[tri[:, 1]], new_points[tri[:, 2]])
+        self.lossTrace.append(float(np.linalg.norm(transformed - closest, axis=1).mean()))
+        self._correspondenceAlpha = np.array(alpha, copy=True)
+        self._correspondence = (new_points, trans, transformed, closest, tri, weights)
+        return self._correspondence
+
+    # 残差：变换后的采集点减去其在模型表面上的最近点
+    def residuals(self, alpha):
+        _, _, transformed, closest, _, _ = self.findCorrespondence(alpha)
+        return (transformed - closest).ravel()
+
+    # 残差对形状权重的 Gauss-Newton 近似雅可比矩阵：最近点所在三角形和重心坐标视为常数，
+    # 忽略最近点沿表面的滑动，只在对应关系不变时是精确导数；与有限差分相比误差可达数十个百分点，
+    # 每次迭代都重新求对应关系，收敛到的仍是残差的驻点
+    def jacobian(self, alpha):
+        new_points, trans, transformed, closest, tri, weights = self.findCorrespondence(alpha)
+        closestBasis = np.einsum('nv,nvck->nck', weights, self.basis[tri])
+        return self.correspondenceJacobian(new_points[self.landmarkIndex], trans, closestBasis)
+
+    # 固定最近点所在三角形和重心坐标时的雅可比矩阵，closestBasis 为最近点对应的基底行 (n,3,K)
+    def correspondenceJacobian(self, landmarks, trans, closestBasis):
+        R = trans[0:3, 0:3]
+        x = self.keypoints
+        y = landmarks
+        xc = x - x.mean(axis=0)
+        yc = y - y.mean(axis=0)
+        landmarkBasis = self.landmarkBasis  # (L,3,K)
+
+        # 刚性配准 R 对标志点的导数：R^T M 对称，扰动后保持对称
+        M = np.dot(yc.T, xc)
+        S = np.dot(R.T, M)
+        A = np.trace(S) * np.eye(3) - S
+        dM = np.einsum('lck,ld->kcd', landmarkBasis, xc)  # (K,3,3)
+        G = np.einsum('ba,kbd->kad', R, dM) - np.einsum('kba,bd->kad', dM, R)
+        g = np.stack([G[:, 2, 1], G[:, 0, 2], G[:, 1, 0]], axis=1)  # (K,3)
+        omega = np.linalg.solve(A, g.T).T  # (K,3)
+        dCenter = landmarkBasis.mean(axis=0)  # (3,K)
+
+        # d(T·p)/dalpha = R (omega × (p - x̄)) + d(ȳ)
+        q = self.meshPoints - x.mean(axis=0)
+        cross = np.cross(omega[None, :, :], q[:, None, :])  # (n,K,3)
+        dTransformed = np.einsum('ab,nkb->nak', R, cross) + dCenter[None, :, :]
+
+        # 最近点随形状变化，保持所在三角形和重心坐标不变
+        return (dTransformed - closestBasis).reshape((-1, self.numberOfModes))
+
+    # 固定对应关系（三角形及重心坐标），不重建定位器，以线性最小二乘迭代求形状权重
+    def solveWeights(self, alpha, tri, weights, iterations=1):
+        # 只取对应三角形顶点的均值和基底行，避免整网格重建
+        closestMean = np.einsum('nv,nvc->nc', weights, self.meanShape[tri])
+        closestBasis = np.einsum('nv,nvck->nck', weights, self.basis[tri])
+        for i in range(iterations):
+            landmarks = self.reconstructLandmarks(alpha)
+            trans = self.computeLandmarkTransform(landmarks)
+            surface = closestMean + np.dot(closestBasis, alpha)
+            r = (self.transformMeshPoints(trans) - surface).ravel()
+            J = self.correspondenceJacobian(landmarks, trans, closestBasis)
+            alpha = alpha - np.linalg.lstsq(J, r, rcond=None)[0]
+        return alpha
+
+    # 交替迭代：求对应关系（建一次定位器）-> 闭式求权重，平均距离不再下降时停止
+    def fitAlternating(self, x0, maxIterations=50, tolerance=1e-6):
+        alpha = np.array(x0, dtype=np.float64)
+        bestAlpha = alpha
+        bestDistance = None
+        for i in range(maxIterations):
+            new_points, trans, transformed, closest, tri, weights = self.findCorrespondence(alpha)
+            d = np.linalg.norm(transformed - closest, axis=1).mean()
+            if bestDistance is not None and bestDistance - d < tolerance:
+                if d < bestDistance:
+                    bestAlpha, bestDistance = alpha, d
+                break
+            bestAlpha, bestDistance = alpha, d
+            alpha = self.solveWeights(alpha, tri, weights)
+        return bestAlpha
+
+    # 由抽稀的平均形状和前 numberOfModes 个主成分构造粗网格拟合器
+    def coarseFitter(self, reduction=0.9, numberOfModes=10):
+        if self.coarseModels is None:
+            model = buildCoarseModel(self.meanShape, self.eigenvectors, self.polydata, self.landmarkIndex,
+                                     reduction, numberOfModes)
+        else:
+            model = self.coarseModels(reduction, numberOfModes)
+        # 共用粗网格的拓扑，点坐标由拟合器单独持有
+        polydata = vtk.vtkPolyData()
+        polydata.ShallowCopy(model.polydata)
+        polydata.SetPoints(vtk.vtkPoints())
+        return SSMFitter(model.meanShape, model.eigenvectors, polydata, model.landmarkIndex,
+                         self.keypoints, self.meshPoints, model.triangles)
+
+    # 由粗到细拟合：粗网格上求前几个主成分的权重，作为完整网格拟合的初值；
+    # tolerance 为完整网格上的收敛容差，默认取 REFINE_TOLERANCE
+    def fitMultiresolution(self, x0=None, solver='lm', reduction=0.9, numberOfModes=10, tolerance=None):
+        if x0 is None:
+            x0 = np.zeros(self.numberOfModes)
+        if tolerance is None:
+            tolerance = REFINE_TOLERANCE.get(solver)
+        coarse = self.coarseFitter(reduction, numberOfModes)
+        coarseAlpha, _ = coarse.fit(np.asarray(x0, dtype=np.float64)[:coarse.numberOfModes], solver)
+        x1 = np.array(x0, dtype=np.float64)
+        x1[:coarse.numberOfModes] = coarseAlpha
+        alpha, trans = self.fit(x1, solver, tolerance)
+        self.coarseNumberOfEvaluations = coarse.numberOfEvaluations
+        self.coarseLossTrace = coarse.lossTrace
+        return alpha, trans
+
+    # 只优化前 numberOfModes 个主成分的拟合器，其余权重取 alpha 中的值并计入平均形状
+    def subsetFitter(self, alpha, numberOfModes):
+        meanShape = self.meanShape
+        if np.any(alpha[numberOfModes:]):
+            rest = np.asarray(alpha[numberOfModes:], dtype=self.eigenvectors.dtype)
+            meanShape = meanShape + np.dot(rest, self.eigenvectors[numberOfModes:]).reshape((self.numberOfPoints, 3))
+        polydata = vtk.vtkPolyData()
+        polydata.ShallowCopy(self.polydata)
+        polydata.SetPoints(vtk.vtkPoints())
+        return SSMFitter(meanShape, self.eigenvectors[:numberOfModes], polydata, self.landmarkIndex,
+                         self.keypoints, self.meshPoints, self.triangles)
+
+    # 主成分是否按方差由大到小排列：ModelBuilder 按 sqrt(方差) 缩放各主成分，行范数即标准差；
+    # 各行范数相同（如单位化的主成分）时无法判断，视为未排列
+    def modesOrderedByVariance(self):
+        norms = np.linalg.norm(self.eigenvectors, axis=1).astype(np.float64)
+        if len(norms) < 2:
+            return False
+        eps = 1e-6 * norms[0]
+        return bool(np.all(np.diff(norms) <= eps) and norms[0] - norms[-1] > eps)
+
+    # 逐步加入主成分：先拟合前 initialModes 个，每次再加 step 个，平均距离的下降不超过 threshold 时停止；
+    # 各阶段以较松的 tolerance 求解，无导数的 COBYLA 由此可大幅减少损失函数的调用次数。
+    # 只适用于 COBYLA，且前面的主成分须解释大部分形状变化：其他求解方式或主成分未按方差排列时
+    # 逐步加入反而更慢、结果更差，直接按 fit 拟合全部主成分
+    def fitProgressive(self, x0=None, solver='cobyla', initialModes=5, step=5, threshold=0.01, tolerance=1e-2):
+        if solver != 'cobyla' or not self.modesOrderedByVariance():
+            return self.fit(x0, solver)
+        if x0 is None:
+            x0 = np.zeros(self.numberOfModes)
+        alpha = np.array(x0, dtype=np.float64)
+        numberOfEvaluations = 0
+        lossTrace = []
+        bestDistance = None
+        activeModes = 0
+        m = min(initialModes, self.numberOfModes)
+        while True:
+            fitter = self.subsetFitter(alpha, m)
+            subAlpha, subTrans = fitter.fit(alpha[:m], solver, tolerance)
+            # fit 结束时模型已是 subAlpha 的形状，直接求平均距离，不经 meanDistance，不计入调用次数
+            distance = computeMeanDistance(fitter.meshPoints, fitter.polydata, subTrans)
+            numberOfEvaluations += fitter.numberOfEvaluations
+            lossTrace += fitter.lossTrace
+            if bestDistance is not None and bestDistance - distance <= threshold:
+                if distance < bestDistance:
+                    alpha[:m] = subAlpha
+                    activeModes = m
+                break
+            alpha[:m] = subAlpha
+            activeModes = m
+            bestDistance = distance
+            if m == self.numberOfModes:
+                break
+            m = min(m + step, self.numberOfModes)
+        self.updatePolyData(self.reconstruct(alpha))
+        trans = self.computeLandmarkTransform(self.reconstructLandmarks(alpha))
+        self.numberOfEvaluations = numberOfEvaluations
+        self.lossTrace = lossTrace
+        self.coarseNumberOfEvaluations = 0
+        self.coarseLossTrace = []
+        self.cacheStatus = None
+        self.numberOfActiveModes = activeModes
+        return alpha, trans
+
+    # 缓存的键：关键点在前、采集点在后
+    def cacheKey(self):
+        return np.vstack([self.keypoints, self.meshPoints]), len(self.keypoints)
+
+    # 缓存结果所依赖的拟合设置：求解方式不同目标不同，主成分精度不同结果也不同
+    def cacheSettings(self, solver):
+        return solver + ':' + self.eigenvectors.dtype.str
+
+    # 直接使用缓存的 FitResult，不做优化
+    def useCachedResult(self, result):
+        self.numberOfEvaluations = 0
+        self.lossTrace = [result.loss]
+        self.coarseNumberOfEvaluations = 0
+        self.coarseLossTrace = []
+        self.cacheStatus = 'hit'
+        self.numberOfActiveModes = self.numberOfModes
+        self.updatePolyData(self.reconstruct(result.alpha))
+        return result.alpha.copy(), result.trans.copy()
+
+    # 带缓存的拟合：输入及设置（cacheSettings）与缓存一致时直接返回，否则从最接近的缓存解开始拟合；
+    # 从缓存解开始时已接近最优，总是在完整网格上拟合全部主成分，multiresolution、progressive 只用于没有缓存解时
+    def fitWithCache(self, cache, x0=None, solver='cobyla', multiresolution=False, progressive=False):
+        inputPoints, numberOfKeypoints = self.cacheKey()
+        settings = self.cacheSettings(solver)
+        result = cache.lookup(inputPoints, numberOfKeypoints, settings)
+        if result is not None:
+            return self.useCachedResult(result)
+        result = cache.nearest(inputPoints, numberOfKeypoints)
+        if result is not None:
+            alpha, trans = self.fit(result.alpha, solver)
+        elif progressive:
+            alpha, trans = self.fitProgressive(x0, solver)
+        elif multiresolution:
+            alpha, trans = self.fitMultiresolution(x0, solver)
+        else:
+            alpha, trans = self.fit(x0, solver)
+        self.cacheStatus = 'miss' if result is None else 'warm'
+        loss = computeMeanDistance(self.meshPoints, self.polydata, trans)
+        cache.store(inputPoints, numberOfKeypoints, alpha, trans, loss, settings)
+        return alpha, trans
+
+    # tolerance 为收敛容差：COBYLA 的 tol、least_squares 的 ftol 或 fitAlternating 的 tolerance，默认取各自的缺省值
+    def fit(self, x0=None, solver='cobyla', tolerance=None):
+        if x0 is None:
+            x0 = np.zeros(self.numberOfModes)
+        self.numberOfEvaluations = 0
+        self.lossTrace = []
+        self.coarseNumberOfEvaluations = 0
+        self.coarseLossTrace = []
+        self.cacheStatus = None
+        self.numberOfActiveModes = self.numberOfModes
+        if solver == 'cobyla':
+            res = minimize(self.meanDistance, x0, method='COBYLA', tol=tolerance)
+        elif solver == 'lm':
+            # lm 要求残差个数不少于变量个数
+            method = 'lm' if 3 * len(self.meshPoints) >= self.numberOfModes else 'trf'
+            res = least_squares(self.residuals, x0, jac=self.jacobian, method=method,
+                                ftol=1e-8 if tolerance is None else tolerance)
+        elif solver == 'icp':
+            res = OptimizeResult(x=self.fitAlternating(x0, tolerance=1e-6 if tolerance is None else tolerance))
+        else:
+            raise ValueError("Unknown SSM solver: " + str(solver))
+        alpha = res.x
+        self.updatePolyData(self.reconstruct(alpha))
+        trans = self.computeLandmarkTransform(self.reconstructLandmarks(alpha))
+        return alpha, trans
@@ -0,0 +1,178 @@
+import os
+import threading
+
+import numpy as np
+import vtk
+
+from .FitCache import FitCache
+from .MeshIO import loadTopology, polyDataFromArrays, trianglesFromPolyData
+from .SSMFitting import (FEMUR_LANDMARK_INDEX, TIBIA_LANDMARK_INDEX, SSMFitter, buildCoarseModel,
+                         computeMeanDistance)
+from .Workers import getProcessPool
+
+LANDMARK_INDEX = {'femur': FEMUR_LANDMARK_INDEX, 'tibia': TIBIA_LANDMARK_INDEX}
+
+
+class ShapeModel:
+    """
+    单块骨骼的统计形状模型：平均形状、主成分和网格拓扑。
+
+    主成分以只读内存映射方式加载，平均形状同样设为只读；
+    同一进程内由 getShapeModel 共享，使用方不得修改这些数组。
+    dtype 为 np.float32 时主成分以单精度保存和计算，内存及重建的访存量减半；
+    文件本身为 float32（ModelBuilder --float32）时仍直接内存映射，否则读入后转换。
+    """
+
+    def __init__(self, directory, bone, dtype=np.float64):
+        if bone not in LANDMARK_INDEX:
+            raise ValueError("Unknown bone: " + str(bone))
+        self.directory = directory
+        self.bone = bone
+        self.dtype = np.dtype(dtype)
+        self.landmarkIndex = LANDMARK_INDEX[bone]
+        self.meanShape = np.load(os.path.join(directory, 'mean_' + bone + '.npy'))
+        self.meanShape.setflags(write=False)
+        self.eigenvectors = np.load(os.path.join(directory, 'ssm_' + bone + '.npy'), mmap_mode='r')
+        if self.eigenvectors.dtype != self.dtype:
+            self.eigenvectors = self.eigenvectors.astype(self.dtype)
+            self.eigenvectors.setflags(write=False)
+        # 拓扑优先读二进制的 mesh_<bone>.npy（见 MeshIO），没有时从模板 vtk 文件中取
+        topologyPath = os.path.join(directory, 'mesh_' + bone + '.npy')
+        if os.path.exists(topologyPath):
+            self.triangles = loadTopology(topologyPath)
+            self._template = polyDataFromArrays(self.meanShape, self.triangles)
+        else:
+            reader = vtk.vtkPolyDataReader()
+            reader.SetFileName(os.path.join(directory, bone.capitalize() + '.vtk'))
+            reader.Update()
+            self._template = vtk.vtkPolyData()
+            self._template.DeepCopy(reader.GetOutput())
+            self.triangles = trianglesFromPolyData(self._template)
+        # 以往拟合结果，重新采集少数点后再生成时作为初值
+        self.fitCache = FitCache()
+        # 由粗到细拟合用的粗网格模型，按 (reduction, numberOfModes) 各抽稀一次
+        self._coarseModels = {}
+        self._coarseModelsLock = threading.Lock()
+
+    # 新建模型，共用拓扑，点坐标单独一份
+    def newPolyData(self):
+        polydata = vtk.vtkPolyData()
+        polydata.ShallowCopy(self._template)
+        points = vtk.vtkPoints()
+        points.DeepCopy(self._template.GetPoints())
+        polydata.SetPoints(points)
+        return polydata
+
+    def newFitter(self, keypoints, meshPoints):
+        return SSMFitter(self.meanShape, self.eigenvectors, self.newPolyData(),
+                         self.landmarkIndex, keypoints, meshPoints, self.triangles, self.coarseModel)
+
+    # 共享的粗网格模型（见 SSMFitting.buildCoarseModel），首次使用时抽稀
+    def coarseModel(self, reduction=0.9, numberOfModes=10):
+        key = (float(reduction), int(numberOfModes))
+        with self._coarseModelsLock:
+            model = self._coarseModels.get(key)
+            if model is None:
+                model = buildCoarseModel(self.meanShape, self.eigenvectors, self._template, self.landmarkIndex,
+                                         reduction, numberOfModes)
+                self._coarseModels[key] = model
+        return model
+
+    def fitMultiStart(self, fitter, x0=None, solver='cobyla', numberOfStarts=8, scale=1.0, seed=0):
+        """
+        多初值并行拟合：x0 及其随机扰动分别在进程池中拟合，取平均距离最小的结果。
+
+        与 SSMFitter.fitWithCache 一样使用 fitCache：采集点及设置与缓存一致时直接返回，
+        相近时以缓存结果代替 x0，结果存入缓存。
+
+        参数:
+        fitter (SSMFitter): 由 newFitter 创建，最优形状会写入其模型。
+        x0 (np.array): 初始权重，默认全零。
+        numberOfStarts (int): 初值个数（含 x0 本身）。
+        scale (float): 扰动的标准差。
+
+        返回:
+        tuple: (权重, 刚性变换)。
+        """
+        inputPoints, numberOfKeypoints = fitter.cacheKey()
+        # 多初值拟合的结果与单次拟合不同，设置中另加标记
+        settings = fitter.cacheSettings(solver) + ':multistart'
+        cached = self.fitCache.lookup(inputPoints, numberOfKeypoints, settings)
+        if cached is not None:
+            return fitter.useCachedResult(cached)
+        cached = self.fitCache.nearest(inputPoints, numberOfKeypoints)
+        if cached is not None:
+            x0 = cached.alpha
+        if x0 is None:
+            x0 = np.zeros(fitter.numberOfModes)
+        x0 = np.asarray(x0, dtype=np.float64)
+        rng = np.random.default_rng(seed)
+        starts = [x0] + [x0 + rng.normal(scale=scale, size=x0.shape) for i in range(numberOfStarts - 1)]
+        pool = getProcessPool()
+        futures = [pool.submit(_fitStart, self.directory, self.bone, self.dtype, fitter.keypoints,
+                               fitter.meshPoints, start, solver) for start in starts]
+        results = [future.result() for future in futures]
+        alpha, trans, loss, numberOfEvaluations, lossTrace = min(results, key=lambda result: result[2])
+        fitter.updatePolyData(fitter.reconstruct(alpha))
+        # 调用次数为各初值之和，损失记录取最优的一次
+        fitter.numberOfEvaluations = sum(result[3] for result in results)
+        fitter.lossTrace = lossTrace
+        fitter.cacheStatus = 'miss' if cached is None else 'warm'
+        self.fitCache.store(inputPoints, numberOfKeypoints, alpha, trans, loss, settings)
+        return alpha, trans
+
+
+# 工作进程中执行的单次拟合，返回 (权重, 刚性变换, 平均距离, 调用次数, 损失记录)
+def _fitStart(directory, bone, dtype, keypoints, meshPoints, x0, solver):
+    fitter = getShapeModel(directory, bone, dtype).newFitter(keypoints, meshPoints)
+    alpha, trans = fitter.fit(x0, solver)
+    loss = computeMeanDistance(fitter.meshPoints, fitter.polydata, trans)
+    return alpha, trans, loss, fitter.numberOfEvaluations, fitter.lossTrace
+
+
+_shapeModels = {}
+_shapeModelsLock = threading.Lock()
+
+
+def getShapeModel(directory, bone, dtype=np.float64):
+    """
+    取得进程内共享的形状模型，每个目录下的每块骨骼按每种精度只加载一次。
+
+    参数:
+    directory (str): 存放 mean_<bone>.npy、ssm_<bone>.npy 等文件的目录。
+    bone (str): 'femur' 或 'tibia'。
+    dtype: 主成分的精度，np.float64 或 np.float32。
+
+    返回:
+    ShapeModel: 共享的只读模型。
+    """
+    key = (os.path.abspath(directory), bone, np.dtype(dtype).str)
+    with _shapeModelsLock:
+        model = _shapeModels.get(key)
+        if model is None:
+            model = ShapeModel(key[0], bone, dtype)
+            _shapeModels[key] = model
+    return model
+
+
+def comparePrecision(directory, bone, keypoints, meshPoints, solver='lm', x0=None):
+    """
+    分别以 float32 和 float64 的主成分拟合同一组采集点，比较拟合结果，用于验证单精度模式。
+
+    参数:
+    keypoints (np.array): 关键点，与 SSMFitter 的输入一致。
+    meshPoints (np.array): 采集点。
+
+    返回:
+    dict: 'meanDistance32'/'meanDistance64' 为采集点到各自拟合表面的平均距离，
+          'surfaceDeviation' 为两个拟合表面对应顶点的最大距离（均为模型坐标下的 mm）。
+    """
+    result = {}
+    points = {}
+    for name, dtype in (('32', np.float32), ('64', np.float64)):
+        fitter = getShapeModel(directory, bone, dtype).newFitter(keypoints, meshPoints)
+        alpha, trans = fitter.fit(x0, solver)
+        result['meanDistance' + name] = computeMeanDistance(fitter.meshPoints, fitter.polydata, trans)
+        points[name] = fitter.points.copy()
+    result['surfaceDeviation'] = float(np.linalg.norm(points['32'] - points['64'], axis=1).max())
+    return result
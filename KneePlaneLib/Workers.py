@@ -0,0 +1,58 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_processPool = None
+_boneExecutors = {}
+_processPoolLock = threading.Lock()
+
+
+def getProcessPool():
+    """
+    进程内共享的进程池，按 CPU 核数创建，首次使用时启动。
+
+    工作进程只导入 KneePlaneLib（不依赖 slicer），形状模型等在各进程内各自缓存；
+    任务落在哪个进程不确定，需要复用缓存的任务应交给 getBoneExecutor。
+    """
+    global _processPool
+    with _processPoolLock:
+        if _processPool is None:
+            _processPool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _processPool
+
+
+def getBoneExecutor(bone):
+    """
+    每种骨骼固定的单进程执行器，首次使用时启动。
+
+    同一骨骼的拟合始终在同一个工作进程中进行，进程内的形状模型、拟合缓存
+    (ShapeModel.fitCache) 及模型缓存 (getCachedMesh) 在重复提交时都能命中；
+    股骨、胫骨各自一个进程，仍可并行。
+
+    参数:
+    bone (str): 'femur' 或 'tibia'。
+
+    返回:
+    ProcessPoolExecutor: 只有一个工作进程的执行器。
+    """
+    with _processPoolLock:
+        executor = _boneExecutors.get(bone)
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=1)
+            _boneExecutors[bone] = executor
+    return executor
+
+
+def shutdownProcessPool():
+    """
+    关闭共享进程池及各骨骼的执行器，模块关闭时调用。
+    """
+    global _processPool
+    with _processPoolLock:
+        executors = list(_boneExecutors.values())
+        _boneExecutors.clear()
+        if _processPool is not None:
+            executors.append(_processPool)
+            _processPool = None
+    for executor in executors:
+        executor.shutdown()
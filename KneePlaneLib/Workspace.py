@@ -0,0 +1,40 @@
+import os
+import shutil
+import tempfile
+
+
+class Workspace:
+    """
+    单个病例的工作目录。
+
+    形状模型、假体库等模板只从 templatePath 读取，不会被改写；
+    规划过程中生成的模型和点文件都写到 path 下。未指定 path 时新建临时目录，
+    cleanup 时删除。Workspace 只保存路径，可以传给工作进程。
+    """
+
+    def __init__(self, templatePath, path=None):
+        self.templatePath = os.path.abspath(templatePath)
+        self.temporary = path is None
+        if path is None:
+            path = tempfile.mkdtemp(prefix='KneePlane_')
+        else:
+            os.makedirs(path, exist_ok=True)
+        self.path = os.path.abspath(path)
+
+    # 模板文件路径（只读）
+    def template(self, *names):
+        return os.path.join(self.templatePath, *names)
+
+    # 输出文件路径
+    def file(self, *names):
+        return os.path.join(self.path, *names)
+
+    def cleanup(self):
+        if self.temporary:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cleanup()
@@ -0,0 +1,26 @@
+from .SSMFitting import (
+    FEMUR_LANDMARK_INDEX,
+    TIBIA_LANDMARK_INDEX,
+    SSMFitter,
+    computeMeanDistance,
+)
+from .Registration import rigidRegistration
+from .FitCache import FitCache, FitResult
+from .FitReport import FitReport
+from .DistanceField import DistanceField
+from .MeshCache import clearMeshCache, getCachedMesh
+from .ImplantLibrary import ImplantLibrary, getImplantLibrary
+from .ShapeModel import ShapeModel, comparePrecision, getShapeModel
+from .Workers import getBoneExecutor, getProcessPool, shutdownProcessPool
+from .MeshIO import (
+    convertTopology,
+    loadMesh,
+    loadTopology,
+    loadVertices,
+    polyDataFromArrays,
+    saveMesh,
+    saveTopology,
+    saveVertices,
+    trianglesFromPolyData,
+)
+from .Workspace import Workspace
@@ -13,6 +13,7 @@ from slicer.i18n import tr as _
 from slicer.i18n import translate
 from slicer.ScriptedLoadableModule import *
 from slicer.util import VTKObservationMixin
+from KneePlaneLib import rigidRegistration
 
 
 #
@@ -874,27 +875,7 @@ class Surgical_NavigationWidget(ScriptedLoadableModuleWidget, VTKObservationMixi
     def registion(self,points_From, points_To):
         if len(points_From)!=len(points_To):
             return
-        fix_point = vtk.vtkPoints()
-        fix_point.SetNumberOfPoints(len(points_From))
-        mov_point = vtk.vtkPoints()
-        mov_point.SetNumberOfPoints(len(points_From))
-        for i in range(len(points_From)):
-            mov_point.SetPoint(i, points_From[i][0], points_From[i][1], points_From[i][2])
-            fix_point.SetPoint(i, points_To[i][0], points_To[i][1], points_To[i][2])
-            
-        fix_point.Modified()
-        mov_point.Modified()
-        landmarkTransform = vtk.vtkLandmarkTransform()
-        landmarkTransform.SetModeToRigidBody()
-        landmarkTransform.SetSourceLandmarks(mov_point)
-        landmarkTransform.SetTargetLandmarks(fix_point)
-
-        landmarkTransform.Update()
-        trans = np.zeros((4, 4))
-        for i in range(4):
-            for j in range(4):
-                trans[i][j] = landmarkTransform.GetMatrix().GetElement(i, j)
-        return trans
+        return rigidRegistration(points_From, points_To)
 
 
     def project_point_to_plane(self,point, plane_node_name):
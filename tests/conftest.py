@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import vtk
+
+# 测试直接导入仓库根目录下的 KneePlaneLib，不依赖 Slicer
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from KneePlaneLib.Benchmark import makeCasePoints, makeShapeModel  # noqa: E402
+from KneePlaneLib.ImplantLibrary import POINT_DIRECTORY, SIZES  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def shapeModelDirectory(tmp_path_factory):
+    """合成的股骨、胫骨形状模型，见 KneePlaneLib.Benchmark。"""
+    directory = str(tmp_path_factory.mktemp('ssm'))
+    for bone in ('femur', 'tibia'):
+        makeShapeModel(directory, bone, resolution=100)
+    return directory
+
+
+@pytest.fixture
+def femurCase(shapeModelDirectory):
+    """股骨的一组采集点，返回 (关键点, 区域采集点)，已换到模型坐标。"""
+    points, alpha = makeCasePoints(shapeModelDirectory, 'femur', 60)
+    keypoints = points[:9] * [-1, -1, 1]
+    meshPoints = np.delete(points, [9, 10], axis=0) * [-1, -1, 1]
+    return keypoints, meshPoints
+
+
+@pytest.fixture(scope='session')
+def implantDirectory(tmp_path_factory):
+    """只含 假体库/a 下各型号 txt 的模板目录，截骨面点在 sphereSurface 的股骨远端附近。"""
+    directory = str(tmp_path_factory.mktemp('implants'))
+    pointDirectory = os.path.join(directory, POINT_DIRECTORY)
+    os.makedirs(pointDirectory)
+    rng = np.random.default_rng(3)
+    for size in SIZES:
+        second = np.array([[20, -30, 40], [-20, -30, 40], [0, -28, 60]]) + rng.normal(scale=2.0, size=(3, 3))
+        third = np.array([[20, 10, 50], [-20, 10, 50], [0, 12, 30]]) + rng.normal(scale=2.0, size=(3, 3))
+        np.savetxt(os.path.join(pointDirectory, 'femur-' + size + '.txt'), np.vstack([second, third]))
+        np.savetxt(os.path.join(pointDirectory, 'Tibia-' + size + '.txt'), rng.normal(scale=20.0, size=(7, 3)))
+    return directory
+
+
+@pytest.fixture
+def sphereSurface():
+    """代替骨骼的球面模型。"""
+    source = vtk.vtkSphereSource()
+    source.SetRadius(35)
+    source.SetThetaResolution(60)
+    source.SetPhiResolution(60)
+    source.SetCenter(0, 0, 30)
+    source.Update()
+    return source.GetOutput()
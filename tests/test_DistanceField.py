@@ -0,0 +1,66 @@
+import numpy as np
+import vtk
+
+from KneePlaneLib.DistanceField import DistanceField, RigidLocator, evaluateLocator
+from KneePlaneLib.ShapeModel import getShapeModel
+
+
+def boneSurface(shapeModelDirectory):
+    model = getShapeModel(shapeModelDirectory, 'femur')
+    fitter = model.newFitter(np.zeros((9, 3)), np.zeros((3, 3)))
+    fitter.updatePolyData(fitter.reconstruct(np.random.default_rng(0).normal(size=fitter.numberOfModes)))
+    return fitter.polydata
+
+
+def test_distance_field_error_bound(shapeModelDirectory):
+    polydata = boneSurface(shapeModelDirectory)
+    implicit = vtk.vtkImplicitPolyDataDistance()
+    implicit.SetInput(polydata)
+    # 表面附近 2 mm 内的查询点
+    surface = np.array(polydata.GetPoints().GetData())[::7]
+    points = surface + np.random.default_rng(1).normal(scale=2.0, size=surface.shape)
+    exact, _ = evaluateLocator(implicit, points)
+    distance, _ = DistanceField(polydata, spacing=1.0).evaluate(points)
+    error = np.abs(distance - exact)
+    # DistanceField 文档中的精度：99% 在 0.05 mm 以内，最大约 0.1 mm
+    assert np.percentile(error, 99) <= 0.05
+    assert error.max() <= 0.12
+
+
+def test_distance_field_falls_back_outside_grid(shapeModelDirectory):
+    polydata = boneSurface(shapeModelDirectory)
+    implicit = vtk.vtkImplicitPolyDataDistance()
+    implicit.SetInput(polydata)
+    field = DistanceField(polydata, spacing=1.0, margin=2.0)
+    points = np.array([[500.0, 0.0, 0.0], [0.0, -300.0, 40.0]])
+    exact, exactClosest = evaluateLocator(implicit, points)
+    distance, closest = field.evaluate(points)
+    assert np.allclose(distance, exact) and np.allclose(closest, exactClosest)
+
+
+def transformPolyData(polydata, matrix):
+    transform = vtk.vtkTransform()
+    transform.SetMatrix(np.asarray(matrix, dtype=np.float64).flatten())
+    transformFilter = vtk.vtkTransformFilter()
+    transformFilter.SetTransform(transform)
+    transformFilter.SetInputData(polydata)
+    transformFilter.Update()
+    return transformFilter.GetPolyDataOutput()
+
+
+def test_rigid_locator_matches_rebuilt_locator(sphereSurface):
+    implicit = vtk.vtkImplicitPolyDataDistance()
+    implicit.SetInput(sphereSurface)
+    rotation = np.array([[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+    # 含镜像时距离取反，与 ssmFemur.HardModel 中 x、y 取反的变换相同
+    for linear in (rotation, np.diag([-1.0, 1.0, 1.0]), np.diag([-1.0, -1.0, 1.0])):
+        matrix = np.eye(4)
+        matrix[0:3, 0:3] = linear
+        matrix[0:3, 3] = [5.0, -3.0, 2.0]
+        rebuilt = vtk.vtkImplicitPolyDataDistance()
+        rebuilt.SetInput(transformPolyData(sphereSurface, matrix))
+        points = np.random.default_rng(2).normal(scale=30.0, size=(50, 3)) + [0, 0, 30]
+        exact, exactClosest = evaluateLocator(rebuilt, points)
+        distance, closest = evaluateLocator(RigidLocator(implicit, matrix), points)
+        assert np.allclose(distance, exact, atol=1e-6)
+        assert np.allclose(closest, exactClosest, atol=1e-6)
@@ -0,0 +1,95 @@
+import numpy as np
+
+from KneePlaneLib import FitCache
+from KneePlaneLib.ShapeModel import getShapeModel
+from KneePlaneLib.Workers import shutdownProcessPool
+
+
+def test_lookup_within_tolerance():
+    cache = FitCache(tolerance=1e-3)
+    points = np.arange(30, dtype=np.float64).reshape((10, 3))
+    cache.store(points, 9, np.ones(4), np.eye(4), 0.5)
+    assert cache.lookup(points + 4e-4, 9).loss == 0.5
+    assert cache.lookup(points + 1e-2, 9) is None
+    # 关键点个数不同时不算同一输入
+    assert cache.lookup(points + 4e-4, 8) is None
+
+
+def test_lookup_requires_same_settings():
+    cache = FitCache()
+    points = np.zeros((10, 3))
+    cache.store(points, 9, np.ones(4), np.eye(4), 0.5, 'cobyla:<f8')
+    assert cache.lookup(points, 9, 'cobyla:<f8').loss == 0.5
+    assert cache.lookup(points, 9, 'lm:<f8') is None
+    assert cache.lookup(points + 4e-4, 9, 'cobyla:<f4') is None
+    # 不同设置的结果仍可作为初值
+    assert cache.nearest(points, 9) is not None
+
+
+def test_nearest_within_warm_start_distance():
+    cache = FitCache(warmStartDistance=10.0)
+    points = np.zeros((12, 3))
+    cache.store(points, 9, np.ones(4), np.eye(4), 0.5)
+    cache.store(points + 5.0, 9, 2 * np.ones(4), np.eye(4), 0.5)
+    assert np.all(cache.nearest(points + 4.0, 9).alpha == 2)
+    assert cache.nearest(points + 100.0, 9) is None
+
+
+def test_maxSize_evicts_oldest():
+    cache = FitCache(maxSize=2)
+    for i in range(3):
+        cache.store(np.full((10, 3), float(i)), 9, np.ones(4), np.eye(4), i)
+    assert cache.lookup(np.zeros((10, 3)), 9) is None
+    assert cache.lookup(np.full((10, 3), 2.0), 9).loss == 2
+
+
+def test_repeat_fit_returns_cached_result(shapeModelDirectory, femurCase):
+    keypoints, meshPoints = femurCase
+    model = getShapeModel(shapeModelDirectory, 'femur')
+    model.fitCache.clear()
+    fitter = model.newFitter(keypoints, meshPoints)
+    alpha, trans = fitter.fitWithCache(model.fitCache, None, 'lm')
+    assert fitter.cacheStatus == 'miss' and fitter.numberOfEvaluations > 0
+
+    # 相同的采集点不再优化，模型形状与第一次一致
+    repeat = model.newFitter(keypoints, meshPoints)
+    alpha2, trans2 = repeat.fitWithCache(model.fitCache, None, 'lm')
+    assert repeat.cacheStatus == 'hit'
+    assert repeat.numberOfEvaluations == 0
+    assert np.allclose(alpha2, alpha) and np.allclose(trans2, trans)
+    assert np.allclose(repeat.points, fitter.points)
+
+
+def test_other_solver_or_precision_is_not_a_hit(shapeModelDirectory, femurCase):
+    keypoints, meshPoints = femurCase
+    model = getShapeModel(shapeModelDirectory, 'femur')
+    model.fitCache.clear()
+    model.newFitter(keypoints, meshPoints).fitWithCache(model.fitCache, None, 'lm')
+    icp = model.newFitter(keypoints, meshPoints)
+    icp.fitWithCache(model.fitCache, None, 'icp')
+    assert icp.cacheStatus == 'warm'
+
+    single = getShapeModel(shapeModelDirectory, 'femur', np.float32)
+    single.fitCache.store(*model.newFitter(keypoints, meshPoints).cacheKey(), np.zeros(30), np.eye(4), 0.0,
+                          'lm:<f8')
+    fitter = single.newFitter(keypoints, meshPoints)
+    fitter.fitWithCache(single.fitCache, None, 'lm')
+    assert fitter.cacheStatus == 'warm'
+
+
+def test_repeat_multistart_fit_returns_cached_result(shapeModelDirectory, femurCase):
+    keypoints, meshPoints = femurCase
+    model = getShapeModel(shapeModelDirectory, 'femur')
+    model.fitCache.clear()
+    try:
+        fitter = model.newFitter(keypoints, meshPoints)
+        alpha, trans = model.fitMultiStart(fitter, None, 'lm', numberOfStarts=2)
+        assert fitter.cacheStatus == 'miss'
+
+        repeat = model.newFitter(keypoints, meshPoints)
+        alpha2, trans2 = model.fitMultiStart(repeat, None, 'lm', numberOfStarts=2)
+        assert repeat.cacheStatus == 'hit'
+        assert repeat.numberOfEvaluations == 0
+        assert np.allclose(alpha2, alpha) and np.allclose(trans2, trans)
+    finally:
+        shutdownProcessPool()
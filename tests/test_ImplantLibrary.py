@@ -0,0 +1,36 @@
+import os
+
+import numpy as np
+import pytest
+
+from KneePlaneLib import ImplantLibrary, getImplantLibrary
+from KneePlaneLib.ImplantLibrary import INDEX_NAME, SIZES
+
+
+def test_save_load_round_trip(implantDirectory, tmp_path):
+    library = ImplantLibrary.fromText(implantDirectory)
+    assert library.femurCutPoints.shape == (len(SIZES), 6, 3)
+    assert np.allclose(library.femurCutPoints[1],
+                       np.loadtxt(os.path.join(implantDirectory, '假体库', 'a', 'femur-2.txt')))
+    path = str(tmp_path / 'index.npz')
+    library.save(path)
+    loaded = ImplantLibrary.load(path)
+    assert loaded.sizes == library.sizes
+    for name in ('femurCutPoints', 'tibiaPoints', 'femurPlaneCenters', 'femurPlaneNormals',
+                 'femurLeftMeshes', 'tibiaMeshes', 'insertMeshes'):
+        assert np.array_equal(getattr(loaded, name), getattr(library, name))
+    assert loaded.femurMesh('R', 2) == library.femurRightMeshes[2]
+
+
+def test_arrays_are_read_only(implantDirectory):
+    library = ImplantLibrary.fromText(implantDirectory)
+    with pytest.raises(ValueError):
+        library.femurCutPoints[0, 0, 0] = 1.0
+
+
+def test_shared_per_directory(implantDirectory):
+    library = getImplantLibrary(implantDirectory)
+    assert getImplantLibrary(implantDirectory + os.sep) is library
+    # 没有 index.npz 时读 txt
+    assert not os.path.exists(os.path.join(implantDirectory, INDEX_NAME))
+    assert np.array_equal(library.tibiaPoints, ImplantLibrary.fromText(implantDirectory).tibiaPoints)
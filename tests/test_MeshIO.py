@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+import vtk
+
+from KneePlaneLib import (convertTopology, loadMesh, loadTopology, polyDataFromArrays, saveMesh, saveTopology,
+                          trianglesFromPolyData)
+
+
+def test_arrays_round_trip(sphereSurface):
+    triangles = trianglesFromPolyData(sphereSurface)
+    points = np.array(sphereSurface.GetPoints().GetData())
+    polydata = polyDataFromArrays(points, triangles)
+    assert np.array_equal(trianglesFromPolyData(polydata), triangles)
+    assert np.allclose(np.array(polydata.GetPoints().GetData()), points)
+
+
+def test_files_round_trip(sphereSurface, tmp_path):
+    writer = vtk.vtkPolyDataWriter()
+    writer.SetFileName(str(tmp_path / 'Femur.vtk'))
+    writer.SetInputData(sphereSurface)
+    writer.Write()
+    triangles = convertTopology(str(tmp_path / 'Femur.vtk'), str(tmp_path / 'mesh_femur.npy'))
+    assert triangles.dtype == np.int32
+    assert np.array_equal(loadTopology(str(tmp_path / 'mesh_femur.npy')), triangles)
+
+    saveMesh(str(tmp_path / 'Femur.npy'), sphereSurface)
+    polydata = loadMesh(str(tmp_path / 'Femur.npy'), triangles)
+    assert np.allclose(np.array(polydata.GetPoints().GetData()), np.array(sphereSurface.GetPoints().GetData()))
+
+    saveTopology(str(tmp_path / 'copy.npy'), triangles.astype(np.int64))
+    assert loadTopology(str(tmp_path / 'copy.npy'), mmap=False).dtype == np.int32
+
+
+def test_rejects_non_triangle_mesh():
+    plane = vtk.vtkPlaneSource()
+    plane.Update()
+    with pytest.raises(ValueError):
+        trianglesFromPolyData(plane.GetOutput())
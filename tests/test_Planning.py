@@ -0,0 +1,106 @@
+import os
+
+import numpy as np
+import pytest
+import vtk
+from scipy.spatial.transform import Rotation
+
+from KneePlaneLib import getImplantLibrary
+from KneePlaneLib.Planning import DistanceCaculate, ssmFemur, ssmTibia
+
+# 股骨规划用到的标志点（截骨调整中的副本），坐标在 sphereSurface 附近
+FEMUR_MARKUPS = {'开髓点1': [0, -10, 60], '内侧凹点1': [-15, -20, 20], '外侧凸点1': [15, -20, 20],
+                 '内侧远端1': [-20, 0, 0], '外侧远端1': [20, 0, -2], '内侧后髁1': [-25, 25, 10],
+                 '外侧后髁1': [25, 25, 10], '外侧皮质高点1': [25, -20, 55], 'A点1': [0, -30, 40],
+                 '股骨头球心1': [0, 0, 400], 'H点1': [0, 0, 380], 'femurUp11': [10, 0, 62], 'femurUp21': [-10, 0, 63]}
+
+
+def newFemur(implantDirectory, polydata, outputPath):
+    femur = ssmFemur()
+    femur.FilePath = implantDirectory
+    femur.outPutPath = outputPath
+    femur.judge = 'L'
+    femur.initLocator('', polydata)
+    for name, point in FEMUR_MARKUPS.items():
+        femur.myScene.AddMarkups(name).AddPoints(np.array(point, dtype=np.float64))
+    return femur
+
+
+def perSizeScores(femur, library, femurUpMean):
+    point2 = np.array(FEMUR_MARKUPS['外侧后髁1'], dtype=np.float64)
+    point3 = np.array(FEMUR_MARKUPS['内侧后髁1'], dtype=np.float64)
+    scores = []
+    matrices = []
+    for i in range(len(library.sizes)):
+        cutPoints = library.femurCutPoints[i].copy()
+        F2, F3, trans = femur.getDisByPlane(cutPoints[0:3], cutPoints[3:6])
+        dd = (F3[0][2] + F3[1][2]) / 2 - (femurUpMean - 4)
+        d1 = abs(dd) * 3 if dd > 0 else abs(dd)
+        d2 = abs(abs(femur.point2area_distance(np.array(F3), point3)) - 7)
+        d3 = abs(abs(femur.point2area_distance(np.array(F3), point2)) - 7)
+        d4 = abs(femur.getDistance(F3[0].copy())) + abs(femur.getDistance(F3[1].copy()))
+        d6 = abs(femur.getDistance(F2[0].copy())) + abs(femur.getDistance(F2[1].copy()))
+        scores.append(d1 + d2 + d3 + d4 + d6 * 2)
+        matrices.append(trans)
+    return np.array(scores), np.array(matrices)
+
+
+def test_getDisByPlanes_matches_getDisByPlane(implantDirectory, sphereSurface, tmp_path):
+    library = getImplantLibrary(implantDirectory)
+    cutPoints = library.femurCutPoints.copy()
+    # 部分型号的第二刀不与外侧皮质高点相交，两种分支都覆盖
+    cutPoints[::2, 0:3, 1] += 80
+    single = newFemur(implantDirectory, sphereSurface, str(tmp_path))
+    expected = [single.getDisByPlane(p[0:3].copy(), p[3:6].copy()) for p in cutPoints]
+    batched = newFemur(implantDirectory, sphereSurface, str(tmp_path))
+    F2, F3, trans = batched.getDisByPlanes(cutPoints[:, 0:3], cutPoints[:, 3:6])
+    for i, (F2i, F3i, transi) in enumerate(expected):
+        assert np.allclose(F2[i], F2i, atol=1e-9)
+        assert np.allclose(F3[i], F3i, atol=1e-9)
+        assert np.allclose(trans[i], transi, atol=1e-9)
+
+
+def test_SelectJiaTi_picks_lowest_per_size_score(implantDirectory, sphereSurface, tmp_path):
+    library = getImplantLibrary(implantDirectory)
+    reference = newFemur(implantDirectory, sphereSurface, str(tmp_path))
+    scores, matrices = perSizeScores(reference, library, (62 + 63) / 2)
+
+    femur = newFemur(implantDirectory, sphereSurface, str(tmp_path))
+    femur.SelectJiaTi()
+    assert femur.minIndex == int(np.argmin(scores))
+    assert np.allclose(femur.FemurYueshuMatrix, matrices[femur.minIndex], atol=1e-9)
+    # 只写病例输出目录
+    assert os.path.exists(os.path.join(str(tmp_path), 'Femur111.stl'))
+
+
+def test_getDistances_matches_getDistance(sphereSurface, tmp_path):
+    writer = vtk.vtkSTLWriter()
+    writer.SetFileName(str(tmp_path / 'Tibia11.stl'))
+    writer.SetInputData(sphereSurface)
+    writer.Write()
+    locator = DistanceCaculate()
+    locator.initLocator('Tibia', str(tmp_path))
+    points = np.random.default_rng(4).normal(scale=30.0, size=(20, 3)) + [0, 0, 30]
+    expected = [locator.getDistance(p.copy()) for p in points]
+    assert np.allclose(locator.getDistances(points), expected)
+
+
+@pytest.mark.parametrize('boneClass', [ssmFemur, ssmTibia])
+def test_HardModel_then_updateLocator_matches_rebuilt_locator(boneClass, sphereSurface):
+    bone = boneClass()
+    bone.initLocator('', sphereSurface)
+    points = np.random.default_rng(5).normal(scale=30.0, size=(40, 3)) + [0, 0, 30]
+    before = bone.getDistances(points)
+    for i in range(2):
+        trans = np.eye(4)
+        trans[0:3, 0:3] = Rotation.random(random_state=i).as_matrix()
+        trans[0:3, 3] = [10.0, -5.0, 20.0 * (i + 1)]
+        bone.HardModel(trans)
+    # 与原先一样，updateLocator 之前仍按移动前的模型查询
+    assert np.allclose(bone.getDistances(points), before)
+    bone.updateLocator()
+    rebuilt = boneClass()
+    rebuilt.initLocator('', bone.polydata)
+    # 移动后的模型点为 float32，两者只差舍入误差
+    assert np.allclose(bone.getDistances(points), rebuilt.getDistances(points), atol=1e-4)
+    assert np.allclose(bone.getClosestPoints(points), rebuilt.getClosestPoints(points), atol=1e-4)
@@ -0,0 +1,40 @@
+import numpy as np
+import vtk
+from scipy.spatial.transform import Rotation
+
+from KneePlaneLib import rigidRegistration
+
+
+def landmarkTransform(source, target):
+    sourcePoints = vtk.vtkPoints()
+    targetPoints = vtk.vtkPoints()
+    for p, q in zip(source, target):
+        sourcePoints.InsertNextPoint(p)
+        targetPoints.InsertNextPoint(q)
+    transform = vtk.vtkLandmarkTransform()
+    transform.SetSourceLandmarks(sourcePoints)
+    transform.SetTargetLandmarks(targetPoints)
+    transform.SetModeToRigidBody()
+    transform.Update()
+    matrix = transform.GetMatrix()
+    return np.array([[matrix.GetElement(i, j) for j in range(4)] for i in range(4)])
+
+
+def test_matches_vtkLandmarkTransform():
+    rng = np.random.default_rng(0)
+    for i in range(5):
+        source = rng.normal(scale=30.0, size=(9, 3))
+        R = Rotation.random(random_state=i).as_matrix()
+        target = np.dot(source, R.T) + rng.normal(scale=10.0, size=3) + rng.normal(scale=0.5, size=source.shape)
+        assert np.allclose(rigidRegistration(source, target), landmarkTransform(source, target), atol=1e-8)
+
+
+def test_batched_matches_single():
+    rng = np.random.default_rng(1)
+    source = rng.normal(size=(4, 6, 3))
+    target = rng.normal(size=(4, 6, 3))
+    batched = rigidRegistration(source, target)
+    for i in range(4):
+        assert np.allclose(batched[i], rigidRegistration(source[i], target[i]))
+        # 始终为旋转，不含反射
+        assert np.isclose(np.linalg.det(batched[i][0:3, 0:3]), 1.0)
@@ -0,0 +1,99 @@
+import numpy as np
+
+from KneePlaneLib.SSMFitting import SSMFitter, computeMeanDistance
+from KneePlaneLib.ShapeModel import getShapeModel
+
+
+def test_coarse_model_is_shared(shapeModelDirectory, femurCase):
+    model = getShapeModel(shapeModelDirectory, 'femur')
+    assert model.coarseModel(0.9, 10) is model.coarseModel(0.9, 10)
+    first = model.newFitter(*femurCase).coarseFitter()
+    second = model.newFitter(*femurCase).coarseFitter()
+    assert first.eigenvectors is second.eigenvectors
+    # 各拟合器的点坐标互不影响
+    first.updatePolyData(first.reconstruct(np.ones(first.numberOfModes)))
+    assert np.allclose(second.points, model.coarseModel(0.9, 10).meanShape)
+
+
+def test_shared_coarse_model_matches_rebuilt(shapeModelDirectory, femurCase):
+    model = getShapeModel(shapeModelDirectory, 'femur')
+    shared = model.newFitter(*femurCase)
+    rebuilt = SSMFitter(model.meanShape, model.eigenvectors, model.newPolyData(), model.landmarkIndex,
+                        *femurCase, model.triangles)
+    alpha, trans = shared.fitMultiresolution(None, 'lm')
+    alpha2, trans2 = rebuilt.fitMultiresolution(None, 'lm')
+    assert np.allclose(alpha, alpha2) and np.allclose(trans, trans2)
+
+
+def test_jacobian_is_exact_for_fixed_correspondences(shapeModelDirectory, femurCase):
+    model = getShapeModel(shapeModelDirectory, 'femur')
+    fitter = model.newFitter(*femurCase)
+    alpha = np.random.default_rng(0).normal(scale=0.5, size=fitter.numberOfModes)
+    _, _, _, _, tri, weights = fitter.findCorrespondence(alpha)
+    closestMean = np.einsum('nv,nvc->nc', weights, model.meanShape[tri])
+    closestBasis = np.einsum('nv,nvck->nck', weights, fitter.basis[tri])
+
+    # 对应关系固定时的残差，与 solveWeights 中的一致
+    def residuals(a):
+        trans = fitter.computeLandmarkTransform(fitter.reconstructLandmarks(a))
+        return (fitter.transformMeshPoints(trans) - closestMean - np.dot(closestBasis, a)).ravel()
+
+    J = fitter.jacobian(alpha)
+    h = 1e-6
+    numeric = np.stack([(residuals(alpha + h * e) - residuals(alpha - h * e)) / (2 * h)
+                        for e in np.eye(fitter.numberOfModes)], axis=1)
+    assert np.allclose(J, numeric, atol=1e-5 * np.abs(numeric).max())
+
+
+def test_progressive_falls_back_without_variance_order(shapeModelDirectory, femurCase):
+    model = getShapeModel(shapeModelDirectory, 'femur')
+    # 合成模型的主成分范数相同，无法判断方差顺序
+    fitter = model.newFitter(*femurCase)
+    assert not fitter.modesOrderedByVariance()
+    alpha, trans = fitter.fitProgressive(None, 'lm')
+    assert fitter.numberOfActiveModes == fitter.numberOfModes
+    expected, _ = model.newFitter(*femurCase).fit(None, 'lm')
+    assert np.allclose(alpha, expected)
+
+
+def test_modes_ordered_by_variance(shapeModelDirectory, femurCase):
+    model = getShapeModel(shapeModelDirectory, 'femur')
+    scale = np.linspace(2.0, 0.5, len(model.eigenvectors))[:, None]
+    ordered = SSMFitter(model.meanShape, scale * model.eigenvectors, model.newPolyData(), model.landmarkIndex,
+                        *femurCase, model.triangles)
+    assert ordered.modesOrderedByVariance()
+    unordered = SSMFitter(model.meanShape, scale[::-1] * model.eigenvectors, model.newPolyData(),
+                         model.landmarkIndex, *femurCase, model.triangles)
+    assert not unordered.modesOrderedByVariance()
+
+
+def test_progressive_counts_only_optimizer_evaluations(shapeModelDirectory, femurCase, monkeypatch):
+    model = getShapeModel(shapeModelDirectory, 'femur')
+    scale = np.linspace(2.0, 0.5, len(model.eigenvectors))[:, None]
+    fitter = SSMFitter(model.meanShape, scale * model.eigenvectors, model.newPolyData(), model.landmarkIndex,
+                       *femurCase, model.triangles)
+    # 各阶段优化器实际调用损失函数的次数
+    stages = []
+    fit = SSMFitter.fit
+
+    def recordingFit(self, *args, **kwargs):
+        result = fit(self, *args, **kwargs)
+        stages.append(self.numberOfEvaluations)
+        return result
+
+    monkeypatch.setattr(SSMFitter, 'fit', recordingFit)
+    fitter.fitProgressive(None, 'cobyla', initialModes=5, step=10, threshold=1.0)
+    assert len(stages) > 1
+    assert fitter.numberOfEvaluations == sum(stages)
+    assert len(fitter.lossTrace) == fitter.numberOfEvaluations
+
+
+def test_lm_loss_not_worse_than_cobyla(shapeModelDirectory, femurCase):
+    model = getShapeModel(shapeModelDirectory, 'femur')
+    losses = {}
+    for solver in ('cobyla', 'lm'):
+        fitter = model.newFitter(*femurCase)
+        alpha, trans = fitter.fit(None, solver)
+        fitter.updatePolyData(fitter.reconstruct(alpha))
+        losses[solver] = computeMeanDistance(fitter.meshPoints, fitter.polydata, trans)
+    assert losses['lm'] <= losses['cobyla']